@@ -0,0 +1,124 @@
+from functools import lru_cache
+
+from probability import BUST, BotOutcomeEngine, addCardToState, getComposition, getSeatState
+
+PRACTICE_TOKEN_BET = 100 # Practice Mode has no bets, so advice is given as if 100 Tokens were bet against one Bot
+
+
+class HitStandAdvisor():
+    '''Advises the User whether to draw another card, by comparing the expected number of Tokens won when standing and when
+    drawing. Uses the cards that are actually left in the Deck, the final hand values of the Bots that have already played, and
+    the hands of the Bots that still have to play, which draw to 17 (using BotOutcomeEngine).
+
+    To stay within a few milliseconds, the Bots' hands are calculated from the cards left at the time of the question, without
+    the cards the User would draw. The User's own draws are exact, and the best value of every (remaining cards, hand value,
+    soft) state is memoized, so later questions within the same shoe mostly come from the cache'''
+
+    def __init__(self, engine = None, cacheSize = 200000):
+        if engine is None:
+            engine = BotOutcomeEngine(cacheSize)
+        self.engine = engine
+        self.standValues = lru_cache(maxsize = cacheSize)(self.calculateStandValues)
+        self.bestValue = lru_cache(maxsize = cacheSize)(self.calculateBestValue)
+
+    def calculateStandValues(self, counts, opponents, tokenBet, noOfPlayers):
+        '''Returns a tuple with the expected Token change of standing on every hand value from 0 to 22 (bust). opponents is a tuple
+        of (handValue, soft, finished) for every Bot, and the pool of tokenBet * noOfPlayers is shared between the winners'''
+        distributions = []
+        for total, soft, finished in opponents:
+            if finished:
+                distribution = [0.0] * (BUST + 1)
+                distribution[min(total, BUST)] = 1.0
+                distributions.append(distribution)
+            else:
+                distributions.append(self.engine.finalDistribution(counts, total, soft))
+
+        pool = tokenBet * noOfPlayers
+        standValues = []
+        for value in range(BUST):
+            # tieCounts[k] is the probability that no Bot beats value and exactly k Bots tie with it
+            tieCounts = [1.0]
+            for distribution in distributions:
+                below = distribution[BUST] + sum(distribution[:value])
+                equal = distribution[value]
+                nextTieCounts = [0.0] * (len(tieCounts) + 1)
+                for ties, probability in enumerate(tieCounts):
+                    nextTieCounts[ties] += probability * below
+                    nextTieCounts[ties + 1] += probability * equal
+                tieCounts = nextTieCounts
+
+            expectedValue = -tokenBet * (1.0 - sum(tieCounts))
+            for ties, probability in enumerate(tieCounts):
+                expectedValue += probability * (pool // (ties + 1) - tokenBet)
+            standValues.append(expectedValue)
+
+        # When the User busts, the Tokens are only returned if every Bot busts as well
+        allBust = 1.0
+        for distribution in distributions:
+            allBust *= distribution[BUST]
+        standValues.append(-tokenBet * (1.0 - allBust))
+
+        return tuple(standValues)
+
+    def calculateBestValue(self, counts, total, soft, standValues):
+        # Expected Token change of the best choice from this hand, by either standing or drawing another card
+        if total > 21:
+            return standValues[BUST]
+
+        stand = standValues[total]
+        remainingCards = sum(counts)
+        if total == 21 or remainingCards == 0:
+            return stand
+
+        return max(stand, self.calculateHitValue(counts, total, soft, standValues))
+
+    def calculateHitValue(self, counts, total, soft, standValues):
+        remainingCards = sum(counts)
+        hit = 0.0
+        for index, count in enumerate(counts):
+            if count == 0:
+                continue
+            nextCounts = counts[:index] + (count - 1,) + counts[index + 1:]
+            nextTotal, nextSoft = addCardToState(total, soft, index + 1)
+            hit += count / remainingCards * self.bestValue(nextCounts, min(nextTotal, BUST), nextSoft, standValues)
+        return hit
+
+    def advise(self, counts, total, soft, opponents, tokenBet, noOfPlayers):
+        '''Returns a dictionary with the expected Token change of standing ('stand') and of drawing another card and then playing
+        on in the best way ('hit'), and the better of the two ('action', either 'hit' or 'stand')'''
+        counts = tuple(counts)
+        standValues = self.standValues(counts, tuple(opponents), tokenBet, noOfPlayers)
+        stand = standValues[min(total, BUST)]
+        if total > 21 or sum(counts) == 0:
+            hit = standValues[BUST]
+        else:
+            hit = self.calculateHitValue(counts, total, soft, standValues)
+
+        return {'stand': stand, 'hit': hit, 'action': 'hit' if hit > stand else 'stand'}
+
+    def getOpponents(self, game):
+        # Builds the opponents of the User in the current round of GameSM, in Practice Mode the User plays against one new Bot
+        if game.state in ('Practice', 'Practice Loop'):
+            return ((0, False, False),), PRACTICE_TOKEN_BET, 2
+
+        opponents = []
+        for botNumber, botPlayer in enumerate(game.botPlayerList):
+            total, soft = getSeatState(botPlayer)
+            opponents.append((total, soft, botNumber < game.botNumberCounter))
+        return tuple(opponents), game.tokenBet, game.no_OfAI + 1
+
+    def adviseGame(self, game):
+        # Advice for the User in the current state of a GameSM
+        opponents, tokenBet, noOfPlayers = self.getOpponents(game)
+        total, soft = getSeatState(game.player)
+        return self.advise(getComposition(game.deck), total, soft, opponents, tokenBet, noOfPlayers)
+
+    def getHint(self, game):
+        # Returns a line of text describing the advice, to be shown at the "draw another card?" prompt
+        advice = self.adviseGame(game)
+        choice = 'draw another card (Y)' if advice['action'] == 'hit' else 'stop drawing (N)'
+        return f"Advisor: drawing is worth {advice['hit']:+.1f} Tokens on average, stopping {advice['stand']:+.1f}. You should {choice}"
+
+    def shouldHit(self, game):
+        # Automated User policy, True if drawing another card is expected to win more Tokens
+        return self.adviseGame(game)['action'] == 'hit'
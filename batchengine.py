@@ -0,0 +1,230 @@
+'''Table-driven engine that plays AI Mode rounds at many tables at once, without any console interface. Every table is in one of
+a few states with an integer ID, and step advances every table by one transition, by passing all tables in the same state to
+the handler of that state in handlers. The context of the tables (seating, whose turn it is, the hands and the tokens) is kept
+as one array per field, indexed by table number, instead of attributes of a GameSM for every table.
+
+The rules are the same as RoundSimulator (simulator.py), so a table plays exactly the same rounds as a RoundSimulator with the
+same seed. The User and the Bots decide with compiled BotPolicy tables (policies.py)'''
+
+import secrets
+import time
+from array import array
+
+from engine import MAX_PLAYERS_REMAINING, Deck, getWinnersList, getTokenChange
+from policies import TABLE_SIZE, ThresholdPolicy, clearBustStates
+from simulator import deriveSeed
+
+DEAL = 0 # 'Start Screen' and 'AI', top up the User, place the bet, seat the User and deal 2 cards to every player
+TURN = 1 # One step of 'AI Loop', the player whose turn it is draws a card or ends the turn
+SETTLE = 2 # End of 'AI Loop', share the pool between the winners and start the next round
+DONE = 3 # Every round of the table has been played
+stateNames = ('Deal', 'Turn', 'Settle', 'Done')
+
+MAX_SEATS = MAX_PLAYERS_REMAINING + 1
+
+
+class TableContext():
+    '''Context of every table, with one array per field indexed by table number. Hands are kept the same way as Player, as the
+    hard total and whether the hand contains an Ace, at index table * MAX_SEATS + slot, where slot 0 is the User and the Bots
+    follow in order (the same order as the handValueList of 'AI Loop')'''
+
+    def __init__(self, noOfTables, noOfBots, startingTokens, rounds):
+        self.state = bytearray([DEAL]) * noOfTables
+        self.noOfPlayers = bytearray([noOfBots + 1]) * noOfTables
+        self.playerPosition = bytearray(noOfTables)
+        self.turnSeat = bytearray(noOfTables) # Seat whose turn it is, the same as playerCounter in GameSM
+        self.hardTotals = bytearray(noOfTables * MAX_SEATS)
+        self.containsAce = bytearray(noOfTables * MAX_SEATS)
+        self.tokens = array('q', [startingTokens]) * noOfTables
+        self.tokenBet = array('q', [0]) * noOfTables
+        self.roundsLeft = array('q', [rounds]) * noOfTables
+
+        # Outcome of the rounds played at every table
+        self.playerWins = array('q', [0]) * noOfTables
+        self.playerSharedWins = array('q', [0]) * noOfTables
+        self.playerLosses = array('q', [0]) * noOfTables
+        self.allBustRounds = array('q', [0]) * noOfTables
+        self.topUps = array('q', [0]) * noOfTables
+
+
+class BatchEngine():
+    '''Plays rounds of AI Mode against noOfBots Bots at noOfTables tables at once. Every table plays rounds rounds with its own
+    Deck, seeded by deriveSeed(masterSeed, table). playerPolicy and botPolicy are BotPolicy objects with a single lookup table
+    (every policy except CompositionPolicy), by default both draw until a hand value of 17'''
+
+    def __init__(self, noOfTables, noOfBots = 3, tokenBet = 100, rounds = 1, masterSeed = None, startingTokens = 1000, \
+        playerPolicy = None, botPolicy = None):
+        if masterSeed is None:
+            masterSeed = secrets.randbits(64)
+        self.masterSeed = masterSeed
+        self.baseTokenBet = tokenBet
+        self.decks = [Deck(deriveSeed(masterSeed, table)) for table in range(noOfTables)]
+        self.context = TableContext(noOfTables, noOfBots, startingTokens, rounds)
+        self.playerTable = self.getPolicyTable(playerPolicy or ThresholdPolicy(17))
+        self.botTable = self.getPolicyTable(botPolicy or ThresholdPolicy(17))
+        self.steps = 0
+
+        # Transition table, the handler of every state ID moves the tables given to it into their next state
+        self.handlers = (self.stepDeal, self.stepTurn, self.stepSettle, None)
+
+    @staticmethod
+    def getPolicyTable(policy):
+        if len(policy.table) != TABLE_SIZE:
+            raise ValueError(f'{policy.getName()} needs the Deck to decide, only policies with a single table can be used')
+        # Policies that set their own table may have left bust states that draw, which would go past the end of the table
+        return bytes(clearBustStates(bytearray(policy.table)))
+
+    def step(self):
+        # Advances every table by one transition, returns the number of tables that have not played all of their rounds
+        tablesByState = [[] for state in stateNames]
+        for table, state in enumerate(self.context.state):
+            tablesByState[state].append(table)
+
+        for state, handler in enumerate(self.handlers):
+            if handler is not None and tablesByState[state]:
+                handler(tablesByState[state])
+
+        self.steps += 1
+        return len(self.context.state) - len(tablesByState[DONE])
+
+    def run(self):
+        # Steps until every table has played all of its rounds, returns the time taken in seconds
+        startTime = time.perf_counter()
+        while self.step():
+            pass
+        return time.perf_counter() - startTime
+
+    def stepDeal(self, tables):
+        context = self.context
+        decks = self.decks
+        tokens = context.tokens
+        tokenBet = context.tokenBet
+        noOfPlayers = context.noOfPlayers
+        hardTotals = context.hardTotals
+        containsAce = context.containsAce
+        topUps = context.topUps
+        baseTokenBet = self.baseTokenBet
+
+        for table in tables:
+            # Same as 'Start Screen', top up the User if there are less than 100 tokens left, and the bet is limited to the tokens left
+            if tokens[table] < 100:
+                tokens[table] += 100
+                topUps[table] += 1
+            tokenBet[table] = min(baseTokenBet, tokens[table])
+
+            deck = decks[table]
+            players = noOfPlayers[table]
+            context.playerPosition[table] = deck.rng.randint(1, players)
+
+            # 2 cards for the User, followed by 2 cards for each Bot
+            index = table * MAX_SEATS
+            for slot in range(index, index + players):
+                firstCard = deck.drawCard().value
+                secondCard = deck.drawCard().value
+                hardTotals[slot] = firstCard + secondCard
+                containsAce[slot] = firstCard == 1 or secondCard == 1
+
+            context.turnSeat[table] = 1
+            context.state[table] = TURN
+
+    def stepTurn(self, tables):
+        context = self.context
+        decks = self.decks
+        state = context.state
+        noOfPlayers = context.noOfPlayers
+        playerPosition = context.playerPosition
+        turnSeat = context.turnSeat
+        hardTotals = context.hardTotals
+        containsAce = context.containsAce
+        playerTable = self.playerTable
+        botTable = self.botTable
+
+        for table in tables:
+            seat = turnSeat[table]
+            position = playerPosition[table]
+            players = noOfPlayers[table]
+            if seat == position:
+                index = table * MAX_SEATS
+                policyTable = playerTable
+            else:
+                # Bots sit in order in the seats that the User is not in
+                index = table * MAX_SEATS + (seat if seat < position else seat - 1)
+                policyTable = botTable
+
+            hardTotal = hardTotals[index]
+            soft = containsAce[index] and hardTotal <= 11
+            handValue = hardTotal + 10 if soft else hardTotal
+
+            # Hands above 21 never draw in a policy table
+            if policyTable[(handValue * 2 + soft) * MAX_SEATS + players - seat]:
+                cardValue = decks[table].drawCard().value
+                hardTotals[index] = hardTotal + cardValue
+                if cardValue == 1:
+                    containsAce[index] = 1
+            elif seat == players:
+                state[table] = SETTLE
+            else:
+                turnSeat[table] = seat + 1
+
+    def stepSettle(self, tables):
+        context = self.context
+        decks = self.decks
+        state = context.state
+        tokens = context.tokens
+        tokenBet = context.tokenBet
+        noOfPlayers = context.noOfPlayers
+        hardTotals = context.hardTotals
+        containsAce = context.containsAce
+        roundsLeft = context.roundsLeft
+
+        for table in tables:
+            players = noOfPlayers[table]
+            index = table * MAX_SEATS
+            handValueList = []
+            for slot in range(index, index + players):
+                hardTotal = hardTotals[slot]
+                handValueList.append(hardTotal + 10 if containsAce[slot] and hardTotal <= 11 else hardTotal)
+
+            winnersList = getWinnersList(handValueList)
+            tokens[table] += getTokenChange(winnersList, 0, tokenBet[table], players)
+            if len(winnersList) == 0:
+                context.allBustRounds[table] += 1
+            elif winnersList[0][0] != 0:
+                context.playerLosses[table] += 1
+            elif len(winnersList) == 1:
+                context.playerWins[table] += 1
+            else:
+                context.playerSharedWins[table] += 1
+
+            decks[table].resetDeck()
+            roundsLeft[table] -= 1
+            state[table] = DEAL if roundsLeft[table] > 0 else DONE
+
+    def getTotals(self):
+        # Returns the outcome of the User at every table added together
+        context = self.context
+        return {'tables': len(context.state), 'rounds': sum(context.playerWins) + sum(context.playerSharedWins) + \
+                sum(context.playerLosses) + sum(context.allBustRounds), 'playerWins': sum(context.playerWins), \
+                'playerSharedWins': sum(context.playerSharedWins), 'playerLosses': sum(context.playerLosses), \
+                'allBustRounds': sum(context.allBustRounds), 'topUps': sum(context.topUps), 'tokens': sum(context.tokens)}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description = 'Play AI Mode rounds at many tables at once')
+    parser.add_argument('tables', type = int, nargs = '?', default = 10000)
+    parser.add_argument('--rounds', type = int, default = 10, help = 'rounds played at every table')
+    parser.add_argument('--bots', type = int, default = 3, choices = range(1, 7))
+    parser.add_argument('--bet', type = int, default = 100)
+    parser.add_argument('--seed', type = int, default = None)
+    args = parser.parse_args()
+
+    batchEngine = BatchEngine(args.tables, args.bots, args.bet, args.rounds, args.seed)
+    elapsed = batchEngine.run()
+    totals = batchEngine.getTotals()
+    print(f"Master seed: {batchEngine.masterSeed}")
+    print(f"{totals['tables']} tables, {totals['rounds']} rounds in {batchEngine.steps} steps and {elapsed:.2f}s "
+        f"({totals['rounds'] / elapsed:,.0f} rounds/sec, {batchEngine.steps * totals['tables'] / elapsed:,.0f} table steps/sec)")
+    print(f"User won {totals['playerWins']}, shared {totals['playerSharedWins']}, lost {totals['playerLosses']}, "
+        f"all players busted in {totals['allBustRounds']} rounds, topped up {totals['topUps']} times")
@@ -0,0 +1,285 @@
+'''Benchmarks for the hot paths of the game engine. Every micro benchmark times a number of operations and reports the time per
+operation in nanoseconds (the best of several repeats), and the macro benchmarks play full headless rounds with 1 to 6 Bots and
+also record the memory allocated while doing so. Results are saved as JSON, and can be compared against a stored baseline:
+
+    python benchmarks.py --save-baseline
+    python benchmarks.py --baseline benchmark_baseline.json
+
+The time to import the engine (engine.py) is also measured in a new interpreter, and has to stay within --import-budget
+milliseconds. Importing the engine must not load the console front-end (blackjack.py) or libdw. This check can also be run on
+its own, as a quick gate that takes about a second:
+
+    python benchmarks.py --import-only'''
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from engine import Deck, UserPlayer, BotPlayer, getWinnersList
+from simulator import RoundSimulator
+
+try:
+    import numpy as np
+    from settlement import batchSettle
+except ImportError:
+    # NumPy is not installed, the batch settlement benchmark is skipped
+    batchSettle = None
+
+REPEATS = 5
+IMPORT_BUDGET_MS = 20 # Maximum time to import engine.py
+FRONT_END_MODULES = ('blackjack', 'libdw', 'pacing') # Modules that importing engine.py must not load
+
+
+def timeOperations(function, operations):
+    # Runs function (which performs operations operations) REPEATS times, returns the best time per operation in nanoseconds
+    bestTime = None
+    for repeat in range(REPEATS):
+        startTime = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - startTime
+        if bestTime is None or elapsed < bestTime:
+            bestTime = elapsed
+    return bestTime / operations * 1e9
+
+
+def dealHands(deck, noOfHands, cardsPerHand, playerClass = UserPlayer):
+    # Deals noOfHands hands of cardsPerHand cards, resetting the deck whenever it runs low
+    hands = []
+    for hand in range(noOfHands):
+        if deck.cursor > 52 - cardsPerHand:
+            deck.resetDeck()
+        player = playerClass('Bot') if playerClass is BotPlayer else playerClass()
+        for card in range(cardsPerHand):
+            player.addCard(deck.drawCard())
+        hands.append(player)
+    return hands
+
+
+def benchmarkDrawCard(operations):
+    deck = Deck(1)
+
+    def run():
+        for operation in range(operations // 52):
+            for card in range(52):
+                deck.drawCard()
+            deck.resetDeck()
+    return timeOperations(run, operations // 52 * 52)
+
+
+def benchmarkResetDeck(operations):
+    deck = Deck(1)
+
+    def run():
+        for operation in range(operations):
+            deck.drawCard()
+            deck.resetDeck()
+    return timeOperations(run, operations)
+
+
+def benchmarkHandValue(operations):
+    hands = dealHands(Deck(1), 100, 4)
+
+    def run():
+        for operation in range(operations // 100):
+            for hand in hands:
+                hand.handValue()
+    return timeOperations(run, operations // 100 * 100)
+
+
+def benchmarkPrintHand(operations):
+    # Every hand is rendered as it grows from 2 to 5 cards, the same as a turn in 'AI Loop'
+    deck = Deck(1)
+    cards = [deck.drawCard() for card in range(5)]
+
+    def run():
+        for operation in range(operations // 4):
+            player = UserPlayer()
+            player.addCard(cards[0])
+            for card in cards[1:]:
+                player.addCard(card)
+                player.getPrintHand()
+    return timeOperations(run, operations // 4 * 4)
+
+
+def benchmarkConcealedHand(operations):
+    deck = Deck(1)
+    cards = [deck.drawCard() for card in range(5)]
+
+    def run():
+        for operation in range(operations // 4):
+            botPlayer = BotPlayer('Bot')
+            botPlayer.addCard(cards[0])
+            for card in cards[1:]:
+                botPlayer.addCard(card)
+                botPlayer.getConcealedHand()
+    return timeOperations(run, operations // 4 * 4)
+
+
+def benchmarkSettlement(operations):
+    # Winner calculation and the User's payout at the end of 'AI Loop' for tables of 7 players
+    deck = Deck(1)
+    tables = []
+    for table in range(100):
+        tables.append([hand.handValue() for hand in dealHands(deck, 7, 3)])
+    tokenBet = 100
+
+    def run():
+        for operation in range(operations // 100):
+            for handValueList in tables:
+                winnersList = getWinnersList(handValueList)
+                if winnersList and winnersList[0][0] == 0:
+                    tokensWon = (tokenBet * len(handValueList)) // len(winnersList) - tokenBet
+    return timeOperations(run, operations // 100 * 100)
+
+
+def benchmarkBatchSettlement(operations):
+    # The same tables as benchmarkSettlement, settled with batchSettle in a single call
+    deck = Deck(1)
+    tables = []
+    for table in range(100):
+        tables.append([hand.handValue() for hand in dealHands(deck, 7, 3)])
+    handValues = np.tile(np.array(tables), (operations // 100, 1))
+    return timeOperations(lambda: batchSettle(handValues, 100), operations // 100 * 100)
+
+
+def benchmarkRounds(noOfBots, rounds):
+    # Plays full headless rounds, returns the time per round in nanoseconds and the peak memory traced while playing them
+    simulator = RoundSimulator(noOfBots, seed = 1)
+    timePerRound = timeOperations(lambda: simulator.simulate(rounds), rounds)
+
+    tracemalloc.start()
+    simulator.simulate(rounds)
+    currentMemory, peakMemory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return timePerRound, peakMemory
+
+
+def measureImportTime(module):
+    '''Imports module in a new interpreter REPEATS times, returns the best time in nanoseconds (from -X importtime) and the
+    modules it loaded'''
+    # The new interpreter is started in the directory of the engine, so that module can be imported wherever this is run from
+    engineDirectory = os.path.dirname(os.path.abspath(__file__))
+    bestTime = None
+    for repeat in range(REPEATS):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import sys, {module}; print(*sys.modules)'], \
+            capture_output = True, text = True, check = True, cwd = engineDirectory)
+        for line in process.stderr.splitlines():
+            # Lines look like "import time: self [us] | cumulative | imported package"
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                importTime = int(fields[1]) * 1000
+                if bestTime is None or importTime < bestTime:
+                    bestTime = importTime
+    return bestTime, process.stdout.split()
+
+
+def checkImportBudget(budgetMs):
+    '''Returns the time to import the engine in nanoseconds, and a list of problems with it, an empty list if it is within
+    budgetMs and loads no front-end module'''
+    problems = []
+    importTime, loadedModules = measureImportTime('engine')
+    if importTime > budgetMs * 1e6:
+        problems.append(f"importing engine takes {importTime / 1e6:.1f}ms, the budget is {budgetMs}ms")
+    for module in FRONT_END_MODULES:
+        if module in loadedModules:
+            problems.append(f"importing engine loads {module}")
+    return importTime, problems
+
+
+def runBenchmarks(quick = False):
+    # Runs every benchmark, returns a dictionary of {benchmark name: {metric: value}}
+    scale = 10 if quick else 1
+    microBenchmarks = {
+        'Deck.drawCard': (benchmarkDrawCard, 52000),
+        'Deck.resetDeck': (benchmarkResetDeck, 50000),
+        'Player.handValue': (benchmarkHandValue, 200000),
+        'Player.getPrintHand': (benchmarkPrintHand, 40000),
+        'BotPlayer.getConcealedHand': (benchmarkConcealedHand, 40000),
+        'getWinnersList settlement': (benchmarkSettlement, 100000),
+    }
+
+    if batchSettle is not None:
+        microBenchmarks['settlement.batchSettle'] = (benchmarkBatchSettlement, 100000)
+
+    results = {}
+    for name, (benchmark, operations) in microBenchmarks.items():
+        results[name] = {'nsPerOperation': benchmark(operations // scale)}
+
+    for module in ('engine', 'blackjack'):
+        results[f'import {module}'] = {'nsPerOperation': measureImportTime(module)[0]}
+
+    for noOfBots in range(1, 7):
+        timePerRound, peakMemory = benchmarkRounds(noOfBots, 5000 // scale)
+        results[f'RoundSimulator {noOfBots} Bots'] = {'nsPerOperation': timePerRound, 'peakMemoryBytes': peakMemory}
+
+    return results
+
+
+def compareToBaseline(results, baseline, tolerance):
+    '''Compares every metric against the baseline, returns a list of regressions, metrics that are more than tolerance
+    (a fraction, 0.2 being 20%) larger than in the baseline'''
+    regressions = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        for metric, value in metrics.items():
+            baselineValue = baseline[name].get(metric)
+            if baselineValue and value > baselineValue * (1 + tolerance):
+                regressions.append((name, metric, baselineValue, value))
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description = 'Benchmark the hot paths of the game engine')
+    parser.add_argument('--output', default = 'benchmark_results.json', help = 'file to save the results to')
+    parser.add_argument('--baseline', default = None, help = 'baseline results to compare against')
+    parser.add_argument('--save-baseline', action = 'store_true', help = 'also save the results as benchmark_baseline.json')
+    parser.add_argument('--tolerance', type = float, default = 0.2, help = 'allowed slowdown before a regression is reported')
+    parser.add_argument('--quick', action = 'store_true', help = 'run 10 times fewer operations')
+    parser.add_argument('--import-budget', type = float, default = IMPORT_BUDGET_MS, help = 'maximum milliseconds to import engine.py')
+    parser.add_argument('--import-only', action = 'store_true', help = 'only check the import budget, without running any benchmark')
+    args = parser.parse_args()
+
+    if args.import_only:
+        importTime, importProblems = checkImportBudget(args.import_budget)
+        print(f"import engine: {importTime / 1e6:.2f}ms (budget {args.import_budget}ms)")
+        for problem in importProblems:
+            print(f"IMPORT BUDGET {problem}")
+        sys.exit(1 if importProblems else 0)
+
+    results = runBenchmarks(args.quick)
+    print(f"{'Benchmark':<34}|{'ns/op':>14} |{'Peak Memory':>14}")
+    print('-' * 66)
+    for name, metrics in results.items():
+        peakMemory = f"{metrics['peakMemoryBytes']:,}" if 'peakMemoryBytes' in metrics else ''
+        print(f"{name:<34}|{metrics['nsPerOperation']:>14,.0f} |{peakMemory:>14}")
+
+    report = {'python': sys.version.split()[0], 'platform': platform.platform(), 'results': results}
+    with open(args.output, 'w') as outputFile:
+        json.dump(report, outputFile, indent = 2)
+    if args.save_baseline:
+        with open('benchmark_baseline.json', 'w') as baselineFile:
+            json.dump(report, baselineFile, indent = 2)
+
+    importTime, importProblems = checkImportBudget(args.import_budget)
+    for problem in importProblems:
+        print(f"IMPORT BUDGET {problem}")
+    if importProblems:
+        sys.exit(1)
+
+    if args.baseline is not None:
+        with open(args.baseline) as baselineFile:
+            baseline = json.load(baselineFile)['results']
+        regressions = compareToBaseline(results, baseline, args.tolerance)
+        for name, metric, baselineValue, value in regressions:
+            print(f"REGRESSION {name} {metric}: {baselineValue:,.0f} -> {value:,.0f} ({value / baselineValue - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
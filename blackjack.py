@@ -1,228 +1,80 @@
 from libdw import sm
-import random
-import time
-import os
-
-class Deck():
-    '''Object that helps to initialize lists of 52 Cards, and provides the method drawCard that returns a card object 
-    from the remaining list of cards randomly, simulating a drawing system from a real deck of cards. Also has method resetDeck to re-initialize cards'''
-
-    dictOfCardValues = {'A': 1, '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10, 'J': 10, 'Q': 10, 'K': 10} # 13 card Values
-    dictOfCardSuits = {'Clubs': '♣', 'Diamonds': '♦', 'Hearts': '♥', 'Spades': '♠'} # 4 Suits, Clubs, Diamonds, Hearts and Spades
-
-    def __init__(self, seed = None):
-        # Initialize Seed if user provides it
-        if seed is not None:
-            random.seed(seed)
-        self.listofCards = []
-
-        # Initialize deck of cards
-        for value in self.dictOfCardValues:
-            for suit in self.dictOfCardSuits:
-                self.listofCards.append((value, suit))
-
-    def drawCard(self):
-        ''' 1. Initializes and returns a card object
-            2. Removes selected card from the listOfcards set'''
-
-        selectedCard = random.choice(self.listofCards)
-        self.listofCards.remove(selectedCard)
-
-        # Create card object to be returned
-        selectedCardObject = Card(self.dictOfCardValues[selectedCard[0]], selectedCard[0], \
-            selectedCard[1], self.dictOfCardSuits[selectedCard[1]])
-        
-        return selectedCardObject
-
-    def resetDeck(self):
-        # Function to reset the Deck by recreating all Card Objects
-        self.listofCards = []
-
-        # Initialize deck of cards
-        for value in self.dictOfCardValues:
-            for suit in self.dictOfCardSuits:
-                self.listofCards.append((value, suit))
-
-        
-class Card():
-    '''Card Object to contain attributes of card passed in and also self.printedCard which is the string array to print card
-    Contains method getPrintedCard, getCardArrayForPrint and getValue'''
-
-    def __init__(self, value, valueSymbol, suit, suitSymbol):
-        self.suit = suit
-        self.value = value
-
-        if valueSymbol != '10':
-            self.printedCard = [ '┌───────┐', \
-                                f'│{valueSymbol}      │', \
-                                '│       │', \
-                                f'|   {suitSymbol}   |', \
-                                '│       │', \
-                                f'│      {valueSymbol}│', \
-                                '└───────┘'
-            ]
+# Card and Player are not used here, they are re-exported so that code importing them from blackjack keeps working
+from engine import Card, Deck, Player, UserPlayer, BotPlayer, getWinnersList
+from pacing import InteractiveClock, NoDelayClock
+from terminal import FrameRenderer, DiscardStream
+from array import array
+import copy
 
-        else:
-            # Print card with a 10
-            self.printedCard = [ '┌───────┐', \
-                                f'│{valueSymbol}     │', \
-                                '│       │', \
-                                f'|   {suitSymbol}   |', \
-                                '│       │', \
-                                f'│     {valueSymbol}│', \
-                                '└───────┘'
-            ]
-
-    def getPrintedCard(self):
-        # Transforms array of lines into a single string, joined by newline characters
-        delimiter = '\n'
-        finalString = delimiter.join(self.printedCard)
-
-        return finalString
-
-    def getCardArrayForPrint(self):
-        '''To provide the basic arrays of the lines of each card, so that Player class can combine each line before printing it altogether'''
-        return self.printedCard
-
-    def getValue(self):
-        return self.value
-
-
-class Player():
-    '''Player Class that contains player's cards for the current game, with method getPrintHand to print all cards currently in hand
-    Acts as Parent Class to UserPlayer and BotPlayer'''
-
-    def __init__(self):
-        self.handCards = []
-
-    def addCard(self, cardObject):
-        self.handCards.append(cardObject)
-
-    def handValue(self):
-        if self.handCards == []:
-            return 0
-        else:
-            cardValue = 0
-            containsAce = False
-            for card in self.handCards:
-                # If card Value is 1, add counter so we can calculate if the Aces are 1 or 11
-                if card.getValue() == 1:
-                    containsAce = True
-
-                cardValue += card.getValue()
+class GameSM(sm.SM):
+    '''Main game engine class with all the logic and a child class of SM, a more detailed explanation is found in README.md'''
 
-            # Since the maximum number of Aces in a hand with the value 11 can only be 1, since 2 Aces with 11 automatically busts you at 22,
-            # Then we only need to check if one of the Aces needs to be converted into an 11
+    start_state = 'Start Screen'
+    positionDict = {1: '1st', 2: '2nd', 3: '3rd', 4: '4th', 5: '5th', 6: '6th', 7: '7th'}
+    botNamesList = BotPlayer.botNamesList
     
-            if containsAce and cardValue <= 11:
-                cardValue += 10 # Ace is converted from 1 to 11, add 10 to value
-
-            return cardValue
-                
-    def getPrintHand(self):
-        # Create blank array of 7 empty strings
-        finalList = ['' for i in range(7)]
-
-        listOfCardArrays = []
-        for card in self.handCards:
-            listOfCardArrays.append(card.getCardArrayForPrint())
-
-        for i in range(7):
-            for cardNumber in range(len(self.handCards)):
-                finalList[i] = finalList[i] + listOfCardArrays[cardNumber][i] + ' '
-        
-        delimiter = '\n'
-        finalString = delimiter.join(finalList)
-
-        return finalString
-
-
-class UserPlayer(Player):
-    '''Child class of Player with attributes and methods to contain and modify UserPlayer's tokens, and clearhand to reset Player's hand cards'''
-    def __init__(self, tokens = 1000):
-        self.tokens = tokens
-        Player.__init__(self)
-
-    def getTokens(self):
-        return self.tokens
-
-    def winTokens(self, amt):
-        self.tokens += amt
-
-    def loseTokens(self, amt):
-        self.tokens -= amt
-
-    def clearHand(self):
-        self.handCards = []
-
-class BotPlayer(Player):
-    '''Child Class of Player which contains the bot's Name, and also a method to print out a concealed hand'''
-    def __init__(self, name):
-        self.name = name
-        Player.__init__(self)
-
-    def getBotName(self):
-        return self.name
-
-    def getConcealedHand(self):
-        # Create blank array of 7 empty strings
-        finalList = ['' for i in range(7)]
-
-        firstCard = self.handCards[0].getCardArrayForPrint()
+    def __init__(self, seed = None, clock = None, inputSource = None, console = True, advisor = None, botPolicy = None, \
+        diffMode = False):
+        # Create Player object for this instance of the game, the Deck's random number generator is also used for seating and Bot names
+        self.player = UserPlayer()
+        self.deck = Deck(seed)
 
-        hiddenCard = [ '┌───────┐', \
-                      f'│░░░░░░░|', \
-                       '│░░░░░░░│', \
-                      f'|░░░░░░░|', \
-                       '│░░░░░░░│', \
-                      f'│░░░░░░░|', \
-                       '└───────┘'
-        ]
+        # All pauses between messages go through the clock, which pauses for the full duration in the console by default
+        if clock is None:
+            clock = InteractiveClock()
+        self.clock = clock
 
-        for i in range(7):
-            finalList[i] = finalList[i] + firstCard[i] + ' '
-            for cardNumber in range(len(self.handCards) - 1):
-                finalList[i] = finalList[i] + hiddenCard[i] + ' '
+        # inputSource is a function that takes in the game and returns the next line of input, by default it is read from the console.
+        # If console is False, the game is not running in a console of its own, and the console is never cleared or paused
+        self.inputSource = inputSource
+        self.console = console
 
-        delimiter = '\n'
-        finalString = delimiter.join(finalList)
+        # Everything the game displays goes through the renderer (terminal.py), which writes a frame at a time, and only uses
+        # ANSI escape codes when the game runs in a console. In diffMode only the rows that changed are redrawn
+        self.renderer = FrameRenderer(ansi = console, diffMode = diffMode)
 
-        return finalString
+        # Optional HitStandAdvisor (advisor.py), that shows the best choice whenever the User is asked to draw another card
+        self.advisor = advisor
 
+        # Optional BotPolicy (policies.py) for every Bot, by default Bots draw until a hand value of 17
+        self.botPolicy = botPolicy
 
-class GameSM(sm.SM):
-    '''Main game engine class with all the logic and a child class of SM, a more detailed explanation is found in README.md'''
+        # Optional GameInstrumentation (instrumentation.py) and RoundRecorder (roundlog.py), set by their attach methods
+        self.instrumentation = None
+        self.recorder = None
 
-    start_state = 'Start Screen'
-    positionDict = {1: '1st', 2: '2nd', 3: '3rd', 4: '4th', 5: '5th', 6: '6th', 7: '7th'}
-    botNamesList = ["WALL-E", "DEEP LEARNING", "MACHINE LEARNING", "DAVE", "INTEL I-7", \
-        "APE", "ISTD", "HASS", "ESD", "EPD", "INTRO TO DESIGN 3.007", "VOCAREUM", "E-DIMENSION", "MYPORTAL", "#BIG-D", "DESIGN THINKING"]
-    
-    def __init__(self):
-        # Create Player object for this instance of the game
-        self.player = UserPlayer()
-        self.deck = Deck()
+    def step(self, inp):
+        # Same as SM.step, unless instrumentation is attached, in which case it records the step. The output is written after every step
+        if self.instrumentation is None:
+            output = sm.SM.step(self, inp)
+        else:
+            output = self.instrumentation.recordStep(self, sm.SM.step, inp)
+        self.renderer.flush()
+        return output
     
     def get_next_values(self, state, inp):
         if state == 'Start Screen':
-            os.system('cls') # On Non-Windows systems, use os.system('clear')
+            self.clearScreen()
             self.displayStartMessage()
             # Before start screen, check if user has less than 100 tokens, if so, give the user 100 more tokens
-            if self.player.getTokens() < 100:
-                print(f'''-----------------------------------------------------------------------------------------------------------------------------------------------------
+            # The tokens are only added after the input, so that nothing changes before a state asks for input (see saveStepCheckpoint)
+            topUp = self.player.getTokens() < 100
+            if topUp:
+                self.display(f'''-----------------------------------------------------------------------------------------------------------------------------------------------------
 
 Welcome to the Blackjack Simulator Game! You currently have {self.player.getTokens()} Tokens! That's sad :(
 Luckily, the God of Gambling has decided to Bless you with 100 more Tokens. Now you have {self.player.getTokens() + 100} Tokens!
 
 To begin, Enter 1 for Practice Mode, 2 for AI Mode, and 3 to Quit Game: ''')
-                self.player.winTokens(100)
             else:
-                print(f'''-----------------------------------------------------------------------------------------------------------------------------------------------------
+                self.display(f'''-----------------------------------------------------------------------------------------------------------------------------------------------------
 
 Welcome to the Blackjack Simulator Game! You currently have {self.player.getTokens()} Tokens!
 To begin, Enter 1 for Practice Mode, 2 for AI Mode, and 3 to Quit Game: ''')
 
             nextState = self.getUserInputAsInteger(1, 3)
+            if topUp:
+                self.player.winTokens(100, 'top-up')
 
             if nextState == 1:
                 # If 1, g to Practice Mode
@@ -237,93 +89,89 @@ To begin, Enter 1 for Practice Mode, 2 for AI Mode, and 3 to Quit Game: ''')
 
         elif state == 'Practice':
             # Begin Practice Mode
-            os.system('cls') # On Non-Windows systems, use os.system('clear')
-            print('''\n-----------------------------------------------------------------------------------------------------------------------------------------------------
+            self.clearScreen()
+            self.display('''\n-----------------------------------------------------------------------------------------------------------------------------------------------------
 Welcome to Practice Mode! Your tokens will not be affected here\n\n''')
-            time.sleep(1)
-            print('* The Dealer deals you a hand, here are your Cards: *\n')
-            time.sleep(1)
+            self.pause(1)
 
             # Draws 2 cards and add them to players hand
             self.player.addCard(self.deck.drawCard())
             self.player.addCard(self.deck.drawCard())
-            print(self.player.getPrintHand())
-            time.sleep(1)
+            self.displayHand(self.player, '* The Dealer deals you a hand, here are your Cards: *\n', self.player.getPrintHand())
 
             # Get Player Input either YES or NO, then transition to State 'Practice Loop' if YES and 'Start Screen' if NO
-            print(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+            self.display(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+            self.showAdvice()
 
             if self.getUserInputAsChar(yesList = ['Y', 'y'], noList = ['N', 'n']):
                 return ('Practice Loop', True)
             else:
-                print(f"\nGood job! You finished the round with a hand value of {self.player.handValue()}")
+                self.display(f"\nGood job! You finished the round with a hand value of {self.player.handValue()}")
                 return ('Start-Over User Dialog (Practice)', True)
 
         elif state == 'Practice Loop':
-            # Enter Code to Remain in Loop
-            print('\n* The Dealer deals you a card, here are your Cards: *\n')
-            time.sleep(1)
-
-            # Deal user a card, show current hand
+            # Enter Code to Remain in Loop, deal user a card, show current hand
             self.player.addCard(self.deck.drawCard())
-            print(self.player.getPrintHand())
-            time.sleep(1)
+            self.displayHand(self.player, '\n* The Dealer deals you a card, here are your Cards: *\n', self.player.getPrintHand())
 
             currentcardValue = self.player.handValue()
             # After drawing a card, if hand value larger than 21, user has lost and game is ended
             if currentcardValue > 21:
-                print(f"\nThe value of your hand is {self.player.handValue()}. Oops! That's a bust! GAME OVER\n")
+                self.display(f"\nThe value of your hand is {self.player.handValue()}. Oops! That's a bust! GAME OVER\n")
                 return ('Start-Over User Dialog (Practice)', True)
 
             else:
                 # Get Player Input either YES or NO, then transition to State 'Practice Loop' if YES and 'Start Screen' if NO
-                print(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+                self.display(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+                self.showAdvice()
 
                 if self.getUserInputAsChar(yesList = ['Y', 'y'], noList = ['N', 'n']):
                     return ('Practice Loop', True)
                 else:
-                    print(f"\nGood job! You finished the round with a hand value of {self.player.handValue()}")
+                    self.display(f"\nGood job! You finished the round with a hand value of {self.player.handValue()}")
                     return ('Start-Over User Dialog (Practice)', True)
 
         elif state == 'Start-Over User Dialog (Practice)':
             # Reset Deck and user hand cards, and get input from user to decide whether to restart game or to go back to start screen
             self.resetGame()
-            print(f"Would you like to restart your Game? (Y/N)")
+            self.display(f"Would you like to restart your Game? (Y/N)")
 
             if self.getUserInputAsChar(yesList = ['Y', 'y'], noList = ['N', 'n']):
                 return ('Practice', True)
             else:
-                print(f"\nGood job! You finished the round with a hand value of {self.player.handValue()}")
+                self.display(f"\nGood job! You finished the round with a hand value of {self.player.handValue()}")
                 self.resetGame()
                 return ('Start Screen', True)
 
 
         elif state == 'AI':
-            os.system('cls') # On Non-Windows systems, use os.system('clear')
+            self.clearScreen()
             # AI Mode Begins, get input from User, how many bots to play with and how many tokens to bet
             maxNoOfBots = 6
-            print(f'''\n-----------------------------------------------------------------------------------------------------------------------------------------------------
+            self.display(f'''\n-----------------------------------------------------------------------------------------------------------------------------------------------------
 Welcome to AI Mode! You may choose up to {maxNoOfBots} AI to play against. In this game, each AI will mirror your bet, forming a shared pool of tokens.
 The winner wins all tokens in the pool, while multiple winners share their winnings! Good luck!\n''')
-            time.sleep(1)
-            print(f'How many AI do you want to play against? (1-{maxNoOfBots}) ')
+            self.pause(1)
+            self.display(f'How many AI do you want to play against? (1-{maxNoOfBots}) ')
             self.no_OfAI = self.getUserInputAsInteger(1, maxNoOfBots)
 
             #Limit User to 500 tokens, if less than 500 available, limit it to the maximum
             # User will never have below 100 tokens as before every game we check and if they are below than 100, give them 100
             if self.player.getTokens() < 500:
-                print(f'How many tokens would you like to wager? (100-{self.player.getTokens()}) ')
+                self.display(f'How many tokens would you like to wager? (100-{self.player.getTokens()}) ')
                 self.tokenBet = self.getUserInputAsInteger(100, self.player.getTokens())
             else:
-                print('How many tokens would you like to wager? (100-500) ')
+                self.display('How many tokens would you like to wager? (100-500) ')
                 self.tokenBet = self.getUserInputAsInteger(100, 500)
 
             # Determine random starting position for User
-            time.sleep(1)
-            self.playerPosition = random.randint(1, self.no_OfAI + 1)
+            self.pause(1)
+            self.playerPosition = self.choosePlayerPosition()
+            if self.recorder is not None:
+                self.recorder.recordSeat(self.playerPosition, self.no_OfAI)
 
-            print(f"\nThe game will begin now, you will go {self.positionDict[self.playerPosition]}")
-            time.sleep(1)
+            self.display(f"\nThe game will begin now, you will go {self.positionDict[self.playerPosition]}")
+            self.pause(1)
 
             # Draws 2 cards and add them to players hand
             self.player.addCard(self.deck.drawCard())
@@ -335,24 +183,26 @@ The winner wins all tokens in the pool, while multiple winners share their winni
 
             # Draw 2 cards for each bot object
             for num in range(self.no_OfAI):
-                randomBotName = tempBotNameList.pop(random.randint(0, len(tempBotNameList) - 1))
-                botPlayer = BotPlayer(randomBotName)
+                randomBotName = self.chooseBotName(tempBotNameList)
+                if self.recorder is not None:
+                    self.recorder.recordBotName(self.botNamesList.index(randomBotName))
+                botPlayer = BotPlayer(randomBotName, self.botPolicy)
                 botPlayer.addCard(self.deck.drawCard())
                 botPlayer.addCard(self.deck.drawCard())
                 self.botPlayerList.append(botPlayer)
 
             # Console dialog to show bot dealing cards to User and all Bots
-            print("\nDealer is dealing Cards now...")
-            time.sleep(1)
-            print("\nYour Hand:\n" + self.player.getPrintHand())
-            time.sleep(1)
+            self.display("\nDealer is dealing Cards now...")
+            self.pause(1)
+            self.display("\nYour Hand:\n" + self.player.getPrintHand())
+            self.pause(1)
             #Print out each Bot's hand
             for i in range(0, self.no_OfAI):
-                print(f"\n{self.botPlayerList[i].getBotName()} Bot's Hand:\n" + self.botPlayerList[i].getConcealedHand())
-                time.sleep(1)
+                self.display(f"\n{self.botPlayerList[i].getBotName()} Bot's Hand:\n" + self.botPlayerList[i].getConcealedHand())
+                self.pause(1)
 
-            print("\nRound Begin!")
-            time.sleep(1)
+            self.display("\nRound Begin!")
+            self.pause(1)
             #Initialize Player Number counter and Bot Number Counter, to track whose turn it is
             self.playerCounter = 1
             self.botNumberCounter = 0
@@ -364,44 +214,42 @@ The winner wins all tokens in the pool, while multiple winners share their winni
             if self.playerCounter == self.playerPosition:
                 if self.turnStart:
                     # Player has just started turn
-                    print("\nIt's your turn to play now! Here are your cards: \n")
-                    print(self.player.getPrintHand())
-                    time.sleep(1)
+                    self.displayHand(self.player, "\nIt's your turn to play now! Here are your cards: \n", self.player.getPrintHand(), \
+                        captionPause = 0)
 
                     # Get Player Input either YES or NO, then transition to State 'Practice Loop' if YES and 'Start Screen' if NO
-                    print(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+                    self.display(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+                    self.showAdvice()
 
                     if self.getUserInputAsChar(yesList = ['Y', 'y'], noList = ['N', 'n']):
                         self.turnStart = False
                         return ('AI Loop', True)
                     else:
                         self.turnStart = True
-                        print(f"\nYour turn has ended")
+                        self.display(f"\nYour turn has ended")
                         self.playerCounter += 1
                         return ('AI Loop', True)
 
                 else:
                     # Player's Turn, has drawn more than once already
-                    print('\n* The Dealer deals you a card, here are your Cards: *\n')
-                    time.sleep(1)
                     self.player.addCard(self.deck.drawCard())
-                    print(self.player.getPrintHand())
-                    time.sleep(1)
+                    self.displayHand(self.player, '\n* The Dealer deals you a card, here are your Cards: *\n', self.player.getPrintHand())
 
                     currentcardValue = self.player.handValue()
                     if currentcardValue > 21:
-                        print(f"\nThe value of your hand is {self.player.handValue()}. Oops! That's a bust! Your turn is Over\n")
+                        self.display(f"\nThe value of your hand is {self.player.handValue()}. Oops! That's a bust! Your turn is Over\n")
                         self.turnStart = True
                         self.playerCounter += 1
                         return ('AI Loop', True)
                     else:
-                        print(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+                        self.display(f'\nThe value of your hand is {self.player.handValue()}. Would you like to draw another card? (Y/N)')
+                        self.showAdvice()
 
                         if self.getUserInputAsChar(yesList = ['Y', 'y'], noList = ['N', 'n']):
                             return ('AI Loop', True)
                         else:
                             self.turnStart = True
-                            print(f"\nYour turn has ended")
+                            self.display(f"\nYour turn has ended")
                             self.playerCounter += 1
                             return ('AI Loop', True)
 
@@ -409,47 +257,42 @@ The winner wins all tokens in the pool, while multiple winners share their winni
             elif self.playerCounter <= self.no_OfAI + 1:
                 if self.turnStart:
                     # Start a new Turn for AI Bot
-                    print(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot's turn. {self.botPlayerList[self.botNumberCounter].getBotName()} Bot's cards:\n")
-                    time.sleep(1)
-                    print(self.botPlayerList[self.botNumberCounter].getConcealedHand())
-                    botHandValue = self.botPlayerList[self.botNumberCounter].handValue()
-                    time.sleep(1)
-
-                    # If AI Bot has a hand value of 17 and above, Bot shall not draw anymore cards
-                    if botHandValue >= 17:
-                        print(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to pass")
-                        time.sleep(1.5)
+                    botPlayer = self.botPlayerList[self.botNumberCounter]
+                    self.displayHand(botPlayer, f"\n{botPlayer.getBotName()} Bot's turn. {botPlayer.getBotName()} Bot's cards:\n", \
+                        botPlayer.getConcealedHand())
+
+                    # The Bot's policy decides whether to draw another card, by default Bots stop at a hand value of 17 and above
+                    if not self.botPlayerList[self.botNumberCounter].shouldDraw(self.no_OfAI + 1 - self.playerCounter, self.deck):
+                        self.display(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to pass")
+                        self.pause(1.5)
                         self.playerCounter += 1
                         self.botNumberCounter += 1
                         return ('AI Loop', True)
 
                     else:
-                        print(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to draw again")
-                        time.sleep(1.5)
+                        self.display(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to draw again")
+                        self.pause(1.5)
                         self.turnStart = False
                         return ('AI Loop', True)
 
                 else:
                     # AI Bot continues turn, this is Bot's 2nd or greater turn
-                    self.botPlayerList[self.botNumberCounter].addCard(self.deck.drawCard())
-                    print(f'\n* The Dealer deals {self.botPlayerList[self.botNumberCounter].getBotName()} Bot a card *\n')
-                    time.sleep(1)
-                    print(self.botPlayerList[self.botNumberCounter].getConcealedHand())
-                    botHandValue = self.botPlayerList[self.botNumberCounter].handValue()
-                    time.sleep(1)
-
-                    # If AI Bot has a hand value of 17 and above, Bot shall not draw anymore cards
-                    if botHandValue >= 17:
-                        print(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to pass")
-                        time.sleep(1.5)
+                    botPlayer = self.botPlayerList[self.botNumberCounter]
+                    botPlayer.addCard(self.deck.drawCard())
+                    self.displayHand(botPlayer, f'\n* The Dealer deals {botPlayer.getBotName()} Bot a card *\n', botPlayer.getConcealedHand())
+
+                    # The Bot's policy decides whether to draw another card, by default Bots stop at a hand value of 17 and above
+                    if not self.botPlayerList[self.botNumberCounter].shouldDraw(self.no_OfAI + 1 - self.playerCounter, self.deck):
+                        self.display(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to pass")
+                        self.pause(1.5)
                         self.turnStart = True
                         self.playerCounter += 1
                         self.botNumberCounter += 1
                         return ('AI Loop', True)
 
                     else:
-                        print(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to draw again")
-                        time.sleep(1.5)
+                        self.display(f"\n{self.botPlayerList[self.botNumberCounter].getBotName()} Bot chooses to draw again")
+                        self.pause(1.5)
                         return ('AI Loop', True)
 
             else:
@@ -461,15 +304,7 @@ The winner wins all tokens in the pool, while multiple winners share their winni
                     handValueList.append(self.botPlayerList[i].handValue())
 
                 # calculate the higher winning value, which is 21 or below
-                maxWinningValue = 0
-                winnersList = []
-                for player, number in enumerate(handValueList):
-                    if number > maxWinningValue and number <= 21:
-                        maxWinningValue = number
-                        winnersList = [(player, number)]
-                    elif number == maxWinningValue:
-                        nextWinner = (player, number)
-                        winnersList.append(nextWinner)
+                winnersList = self.getWinnersList(handValueList)
 
                 # Get Bot Names to Format table according to the longest Bot Name (Adjust table to Fit Largest Bot Name)
                 botNameList = []
@@ -483,32 +318,33 @@ The winner wins all tokens in the pool, while multiple winners share their winni
                 maxBotNameLength += 6 # 4 Extra characters to account for ' Bot' + 2 more for side spacing
 
                 # Table showcasing results printed
-                print("\nGame Over! Here are the results:\n")
-                time.sleep(1)
-                print(f"{'Player':^{maxBotNameLength}}|{'Hand Value':^14}")
-                print('-'*(15 + maxBotNameLength))
-                print(f"{'You':^{maxBotNameLength}}|{handValueList[0]:^14}")
+                self.display("\nGame Over! Here are the results:\n")
+                self.pause(1)
+                self.display(f"{'Player':^{maxBotNameLength}}|{'Hand Value':^14}")
+                self.display('-'*(15 + maxBotNameLength))
+                self.display(f"{'You':^{maxBotNameLength}}|{handValueList[0]:^14}")
                 for i in range(self.no_OfAI):
                     botNameString = f"{self.botPlayerList[i].getBotName()} Bot"
-                    print(f"{botNameString:^{maxBotNameLength}}|{handValueList[i+1]:^14}")
+                    self.display(f"{botNameString:^{maxBotNameLength}}|{handValueList[i+1]:^14}")
 
     
+                tokensBefore = self.player.getTokens()
                 if len(winnersList) == 1:
                     # If there is only 1 winner
                     if winnersList[0][0] == 0:
                         # Player has Won!
                         tokensWon = self.tokenBet * (self.no_OfAI + 1)
-                        print(f"\nYou have Won! Congratulations! Your winnings are {tokensWon} Tokens!\n")
+                        self.display(f"\nYou have Won! Congratulations! Your winnings are {tokensWon} Tokens!\n")
                         self.player.winTokens(tokensWon - self.tokenBet)
 
                     else:
                         # Player has lost
-                        print(f"\nYou have lost! Unfortunately, you have lost {self.tokenBet} Tokens.\n")
+                        self.display(f"\nYou have lost! Unfortunately, you have lost {self.tokenBet} Tokens.\n")
                         self.player.loseTokens(self.tokenBet)
 
                 elif len(winnersList) == 0:
                     # List is empty, no player got 21 and below
-                    print(f"\nWOW! It seems like all Players have Busted! You all get your Tokens back :)\n")
+                    self.display(f"\nWOW! It seems like all Players have Busted! You all get your Tokens back :)\n")
                 else:
                     # More than one winner
                     if winnersList[0][0] == 0:
@@ -519,25 +355,30 @@ The winner wins all tokens in the pool, while multiple winners share their winni
                         winnerNames = winnerNames[:-5]
 
                         tokensWon = (self.tokenBet * (self.no_OfAI + 1)) // len(winnersList)
-                        print(f"\n{winnerNames} have shared the Win! You receive {tokensWon}.\n")
+                        self.display(f"\n{winnerNames} have shared the Win! You receive {tokensWon}.\n")
                         self.player.winTokens(tokensWon - self.tokenBet)
 
                     else:
                         # Player has lost
-                        print(f"\nYou have lost! Unfortunately, you have lost {self.tokenBet} Tokens.\n")
+                        self.display(f"\nYou have lost! Unfortunately, you have lost {self.tokenBet} Tokens.\n")
                         self.player.loseTokens(self.tokenBet)
 
+                if self.recorder is not None:
+                    self.recorder.recordSettlement(self.tokenBet, self.player.getTokens() - tokensBefore, winnersList)
                 self.resetGame()
-                os.system('pause') 
+                self.waitForKey()
                 return ('Start Screen', True)
 
 
+    # The settlement of a round is part of the engine (engine.py)
+    getWinnersList = staticmethod(getWinnersList)
+
     def resetGame(self):
         self.deck.resetDeck()
         self.player.clearHand()
 
     def displayStartMessage(self):
-        print(f'''
+        self.display(f'''
 -----------------------------------------------------------------------------------------------------------------------------------------------------
 
 ██████╗ ██╗      █████╗  ██████╗██╗  ██╗     ██╗ █████╗  ██████╗██╗  ██╗    ███████╗██╗███╗   ███╗██╗   ██╗██╗      █████╗ ████████╗ ██████╗ ██████╗ 
@@ -553,25 +394,172 @@ Written by: Ang Song Gee
 
 ''', end = '')
 
+    def display(self, text = '', end = '\n'):
+        # Same as print, the text is written to the console with the rest of the frame
+        self.renderer.write(text, end)
+
+    def displayHand(self, handKey, caption, printedHand, captionPause = 1):
+        '''Displays caption and, after captionPause seconds, the printed hand of a player, then pauses for a second. In diff mode,
+        if a hand with the same handKey was already displayed in this frame, its caption and hand are redrawn where they are
+        instead of below (see FrameRenderer.replaceBlock), so mostly only the new card is drawn'''
+        if self.renderer.replaceBlock(handKey, f'{caption}\n{printedHand}'):
+            self.pause(1)
+            return
+        self.renderer.beginBlock(handKey)
+        self.display(caption)
+        if captionPause:
+            self.pause(captionPause)
+        self.display(printedHand)
+        self.renderer.endBlock()
+        self.pause(1)
+
+    def pause(self, seconds):
+        # Everything displayed so far is shown before pausing
+        self.renderer.flush()
+        self.clock.pause(seconds)
+
+    def clearScreen(self):
+        self.renderer.clear()
+
+    def waitForKey(self):
+        if self.console:
+            self.display('Press Enter to continue . . .')
+            # The line only ends a pause, so it is not recorded, as a replay runs without a console and never asks for it
+            self.readInput(record = False)
+
+    def showAdvice(self):
+        if self.advisor is not None:
+            self.display(self.advisor.getHint(self))
+
+    def readInput(self, record = True):
+        # Gets the next line of User input from the inputSource, or from the console if there is none
+        if self.instrumentation is not None:
+            return self.instrumentation.recordInput(lambda: self.readInputLine(record))
+        return self.readInputLine(record)
+
+    def readInputLine(self, record = True):
+        self.renderer.flush(complete = True)
+        if self.inputSource is None:
+            userInput = input("")
+            self.renderer.recordInput(userInput)
+        else:
+            userInput = self.inputSource(self)
+
+        if record and self.recorder is not None:
+            self.recorder.recordInput(userInput)
+        return userInput
+
+    def choosePlayerPosition(self):
+        # Random starting position for the User, between 1 and the number of players
+        return self.deck.rng.randint(1, self.no_OfAI + 1)
+
+    def chooseBotName(self, tempBotNameList):
+        # Removes a random name from tempBotNameList and returns it
+        return tempBotNameList.pop(self.deck.rng.randint(0, len(tempBotNameList) - 1))
+
+    def saveStepCheckpoint(self):
+        '''Returns everything that a state can change before it asks for input: the Deck, the User's hand and the User's tokens.
+        Restoring this checkpoint with restoreStepCheckpoint and stepping again repeats the step exactly, given the same input'''
+        deck = self.deck
+        return (deck.shoe.tobytes(), deck.cursor, deck.rng.getstate(), tuple(self.player.handCards), self.player.getTokens())
+
+    def restoreStepCheckpoint(self, checkpoint):
+        shoe, cursor, rngState, handCards, tokens = checkpoint
+        self.deck.shoe = array('B', shoe)
+        self.deck.shoeShared = False
+        self.deck.cursor = cursor
+        self.deck.rng.setstate(rngState)
+        self.deck.recalculateCounts()
+
+        self.restoreHand(self.player, handCards)
+        self.player.tokens = tokens
+
+    @staticmethod
+    def restoreHand(player, handCards):
+        # Replaces the hand of a player with the given Cards, returns the player
+        player.clearHand()
+        for card in handCards:
+            player.addCard(card)
+        return player
+
+    def isUserTurn(self):
+        # Returns True if the next step of an AI Mode round is the User's turn, which asks the User to draw another card (Y/N)
+        return self.state == 'AI Loop' and self.playerCounter == self.playerPosition
+
+    def checkRoundInProgress(self):
+        if self.state != 'AI Loop':
+            raise ValueError(f"A round can only be saved or forked in the middle of an AI Mode round, not in the state '{self.state}'")
+
+    def saveRoundSnapshot(self):
+        '''Returns the state of the AI Mode round being played, between two steps of 'AI Loop': the Deck (the order of the shoe,
+        the cursor, the random number generator and the index of the cards left), the hands of the User and every Bot, the
+        User's tokens and bet, the seating and whose turn it is. Hands are kept as tuples of the shared Card objects. Restoring
+        the snapshot with restoreRoundSnapshot and stepping again plays the rest of the round exactly the same, given the same input'''
+        self.checkRoundInProgress()
+        deck = self.deck
+        return (deck.shoe.tobytes(), deck.cursor, deck.rng.getstate(), tuple(deck.remainingCounts), deck.runningCount, \
+            deck.remainingValue, tuple(self.player.handCards), self.player.getTokens(), self.no_OfAI, self.tokenBet, \
+            self.playerPosition, self.playerCounter, self.botNumberCounter, self.turnStart, \
+            tuple((botPlayer.getBotName(), tuple(botPlayer.handCards)) for botPlayer in self.botPlayerList))
+
+    def restoreRoundSnapshot(self, snapshot):
+        shoe, cursor, rngState, remainingCounts, runningCount, remainingValue, handCards, tokens, self.no_OfAI, self.tokenBet, \
+            self.playerPosition, self.playerCounter, self.botNumberCounter, self.turnStart, bots = snapshot
+        deck = self.deck
+        deck.shoe = array('B', shoe)
+        deck.shoeShared = False
+        deck.cursor = cursor
+        deck.rng.setstate(rngState)
+        deck.remainingCounts = list(remainingCounts)
+        deck.runningCount = runningCount
+        deck.remainingValue = remainingValue
+
+        self.restoreHand(self.player, handCards)
+        self.player.tokens = tokens
+        self.botPlayerList = [self.restoreHand(BotPlayer(name, self.botPolicy), botHandCards) for name, botHandCards in bots]
+        self.state = 'AI Loop'
+
+    def fork(self, inputSource = None, seed = None, clock = None, renderer = None):
+        '''Returns a copy of the game in the middle of an AI Mode round, which plays on independently of this game, for example
+        to play out both answers to the User's decision many times. The copy shares the shoe of the Deck with this game until
+        either of them draws a card, and the Cards in the hands are shared, so only the hands themselves are copied. With a seed,
+        the copy draws different cards from the cards left (see Deck.fork). The copy reads its input from inputSource, never
+        pauses (NoDelayClock by default), has no console, and has no recorder, instrumentation or ledger. Its output is thrown
+        away, unless a renderer is given'''
+        self.checkRoundInProgress()
+        game = copy.copy(self)
+        game.deck = self.deck.fork(seed)
+        game.inputSource = inputSource
+        game.clock = clock if clock is not None else NoDelayClock()
+        game.console = False
+        game.renderer = renderer if renderer is not None else FrameRenderer(ansi = False, stream = DiscardStream())
+        game.recorder = None
+        game.instrumentation = None
+
+        game.player = self.restoreHand(UserPlayer(self.player.getTokens()), self.player.handCards)
+        game.botPlayerList = [self.restoreHand(BotPlayer(botPlayer.getBotName(), self.botPolicy), botPlayer.handCards) \
+            for botPlayer in self.botPlayerList]
+        return game
+
     def getUserInputAsInteger(self, start, end):
         # Gets User input, from an integer range containing start and end
         while True:
-            userInput = input("")
+            userInput = self.readInput()
             try:
                 integerInput = int(userInput)
                 if integerInput >= start and integerInput <= end:
                     break
                 else:
-                    print("Value entered is not Valid! Try again:")
+                    self.display("Value entered is not Valid! Try again:")
             except ValueError:
-                print("Value entered is not Valid! Try again: ")
+                self.display("Value entered is not Valid! Try again: ")
 
         return integerInput
 
     def getUserInputAsChar(self, yesList, noList):
         # Gets User input, from an list of Characters, if User inputs char in yesList, return True, vice versa for noList
         while True:
-            userInput = input("")
+            userInput = self.readInput()
             if userInput in yesList:
                 return True
             
@@ -579,14 +567,21 @@ Written by: Ang Song Gee
                 return False
 
             else:
-                print("Character entered is not Valid! Try again")
+                self.display("Character entered is not Valid! Try again")
+
+
+if __name__ == '__main__':
+    import argparse
 
+    parser = argparse.ArgumentParser(description = 'Play the Blackjack Simulator Game')
+    parser.add_argument('--diff', action = 'store_true', help = 'only redraw the rows of the screen that have changed')
+    args = parser.parse_args()
 
-myGame = GameSM()
-myGame.start()
-gameStillOn = True
+    myGame = GameSM(diffMode = args.diff)
+    myGame.start()
+    gameStillOn = True
 
-'''After each state, myGame.step will always return True, to keep loop going, until the player inputs 3 in the Start Screen to close the program, 
-   at that time the output will be False, which is when this while loop will terminate and the program will end '''
-while (gameStillOn):
-    gameStillOn = myGame.step(True)
\ No newline at end of file
+    '''After each state, myGame.step will always return True, to keep loop going, until the player inputs 3 in the Start Screen to close the program, 
+       at that time the output will be False, which is when this while loop will terminate and the program will end '''
+    while (gameStillOn):
+        gameStillOn = myGame.step(True)
\ No newline at end of file
@@ -0,0 +1,427 @@
+'''Core of the Blackjack game, the Card, Deck and Player classes and the settlement of a round, without any console
+interface. Imports in a few milliseconds, so it can be used as a library and by worker processes, GameSM (blackjack.py) is
+the console front-end built on top of it'''
+
+import random
+from array import array
+from itertools import product
+
+MAX_PLAYERS_REMAINING = 6 # With 6 Bots and the User, up to 6 players play after the first one
+
+class Card():
+    '''Card Object to contain attributes of card passed in and also self.printedCard which is the tuple of strings to print card
+    Contains method getPrintedCard, getCardArrayForPrint and getValue
+
+    Only 52 different cards exist, so Deck creates every Card once (Deck.cardTable) and every draw returns one of those shared
+    objects. Cards therefore use __slots__ and cannot be modified after they are created'''
+
+    __slots__ = ('suit', 'value', 'valueSymbol', 'suitSymbol', 'printedCard')
+
+    def __init__(self, value, valueSymbol, suit, suitSymbol):
+        setAttribute = object.__setattr__
+        setAttribute(self, 'suit', suit)
+        setAttribute(self, 'value', value)
+        setAttribute(self, 'valueSymbol', valueSymbol)
+        setAttribute(self, 'suitSymbol', suitSymbol)
+
+        if valueSymbol != '10':
+            printedCard = ( '┌───────┐', \
+                           f'│{valueSymbol}      │', \
+                            '│       │', \
+                           f'|   {suitSymbol}   |', \
+                            '│       │', \
+                           f'│      {valueSymbol}│', \
+                            '└───────┘'
+            )
+
+        else:
+            # Print card with a 10
+            printedCard = ( '┌───────┐', \
+                           f'│{valueSymbol}     │', \
+                            '│       │', \
+                           f'|   {suitSymbol}   |', \
+                            '│       │', \
+                           f'│     {valueSymbol}│', \
+                            '└───────┘'
+            )
+        setAttribute(self, 'printedCard', printedCard)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Card objects are shared between hands and cannot be modified')
+
+    def __delattr__(self, name):
+        raise AttributeError('Card objects are shared between hands and cannot be modified')
+
+    def __reduce__(self):
+        # A shared Card is pickled as its code, and unpickled as the same shared object from Deck.cardTable
+        for code, card in enumerate(Deck.cardTable):
+            if card is self:
+                return (getSharedCard, (code,))
+        return (Card, (self.value, self.valueSymbol, self.suit, self.suitSymbol))
+
+    def __copy__(self):
+        # Cards cannot be modified, so a copy is the same object
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def getPrintedCard(self):
+        # Transforms array of lines into a single string, joined by newline characters
+        delimiter = '\n'
+        finalString = delimiter.join(self.printedCard)
+
+        return finalString
+
+    def getCardArrayForPrint(self):
+        '''To provide the basic arrays of the lines of each card, so that Player class can combine each line before printing it altogether'''
+        return self.printedCard
+
+    def getValue(self):
+        return self.value
+
+
+def getSharedCard(code):
+    # Returns the shared Card object with the given code, used to unpickle Cards
+    return Deck.cardTable[code]
+
+
+class Deck():
+    '''Object that holds a shoe of 1 to 8 decks of 52 Cards, and provides the method drawCard that returns a card object 
+    from the remaining cards randomly, simulating a drawing system from a real deck of cards. Also has method resetDeck to re-initialize cards
+
+    Each card is stored as a small integer code in a compact array (the shoe), and a cursor marks how many cards have been dealt.
+    The shoe is shuffled as it is dealt: every draw swaps a random card from the undealt part of the shoe to the cursor, so drawing
+    and resetting the shoe are both O(1). penetration is the fraction of the shoe that is dealt before needsReshuffle returns True
+
+    The Deck also keeps an index of the cards that are left, updated with every draw: the number of cards of every value, the
+    running hi-lo count (+1 for 2 to 6, -1 for 10s and Aces) and the total value of the cards left (Aces as 1). These can be read
+    at any time in O(1) with getRemainingCount, getComposition, getRunningCount, getTrueCount and getRemainingValue
+
+    fork returns a copy of the Deck that shares the shoe with it, until either of them draws a card and takes its own copy'''
+
+    dictOfCardValues = {'A': 1, '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, '10': 10, 'J': 10, 'Q': 10, 'K': 10} # 13 card Values
+    dictOfCardSuits = {'Clubs': '♣', 'Diamonds': '♦', 'Hearts': '♥', 'Spades': '♠'} # 4 Suits, Clubs, Diamonds, Hearts and Spades
+    maxNoOfDecks = 8
+
+    # Card codes, code = valueIndex * 4 + suitIndex, in the same order as the original list of (value, suit) tuples
+    cardTupleList = list(product(dictOfCardValues, dictOfCardSuits))
+
+    # Every Card object is created once when the program starts, and drawCard returns these shared objects
+    cardTable = tuple(Card(value, valueSymbol, suit, suitSymbol) \
+        for (valueSymbol, value), (suit, suitSymbol) in product(dictOfCardValues.items(), dictOfCardSuits.items()))
+
+    # Hi-lo count of every card value, index 0 is unused so that values can be used directly
+    hiLoValues = (0, -1, 1, 1, 1, 1, 1, 0, 0, 0, -1)
+
+    # Number of cards of every value in a single deck, index 0 is the number of Aces and index 9 the number of 10s, J, Q and K
+    deckComposition = (4, 4, 4, 4, 4, 4, 4, 4, 4, 16)
+
+    def __init__(self, seed = None, noOfDecks = 1, penetration = 1.0):
+        if noOfDecks < 1 or noOfDecks > self.maxNoOfDecks:
+            raise ValueError(f'noOfDecks must be between 1 and {self.maxNoOfDecks}')
+        if penetration <= 0 or penetration > 1:
+            raise ValueError('penetration must be larger than 0 and at most 1')
+
+        # Each Deck has its own random number generator, seeded if user provides a seed, so that Decks do not share one random stream
+        self.rng = random.Random(seed)
+
+        self.noOfDecks = noOfDecks
+        self.penetration = penetration
+
+        # Initialize shoe of cards, only done once as resetDeck does not need to rebuild it
+        self.shoe = array('B', range(len(self.cardTupleList))) * noOfDecks
+        self.cutCard = max(1, int(len(self.shoe) * penetration))
+        self.cursor = 0
+        self.roundStart = 0 # Cards before roundStart were dealt in earlier rounds, the cards after it are in play
+        self.shoeShared = False # True while the shoe is shared with a fork of this Deck
+        self.noOfCardsDrawn = 0 # Total number of cards drawn from this Deck, never reset
+        self.drawListener = None # Optional function that is called with the code of every card drawn
+
+        # Index of the cards left in a full shoe, which resetCounts goes back to
+        self.fullShoeCounts = tuple(count * noOfDecks for count in self.deckComposition)
+        self.fullShoeValue = sum(count * value for value, count in enumerate(self.fullShoeCounts, 1))
+        self.resetCounts()
+
+    @property
+    def listofCards(self):
+        # List of (value, suit) tuples of the cards that have not been dealt yet
+        return [self.cardTupleList[code] for code in self.shoe[self.cursor:]]
+
+    def drawCard(self):
+        ''' 1. Swaps a random undealt card to the cursor and moves the cursor past it
+            2. Returns the shared card object of the selected card'''
+        if self.shoeShared:
+            self.copyShoe()
+        shoe = self.shoe
+        cursor = self.cursor
+        if cursor >= len(shoe):
+            # Every card has been dealt, the cards of earlier rounds are shuffled back in, the cards in play stay dealt
+            cursor = self.returnDiscards()
+
+        selectedIndex = cursor + int(self.rng.random() * (len(shoe) - cursor))
+        selectedCode = shoe[selectedIndex]
+        shoe[selectedIndex] = shoe[cursor]
+        shoe[cursor] = selectedCode
+        self.cursor = cursor + 1
+        self.noOfCardsDrawn += 1
+
+        # Same as countCard, written out as this is called for every card
+        card = self.cardTable[selectedCode]
+        value = card.value
+        self.remainingCounts[value - 1] -= 1
+        self.runningCount += self.hiLoValues[value]
+        self.remainingValue -= value
+
+        if self.drawListener is not None:
+            self.drawListener(selectedCode)
+
+        return card
+
+    def returnDiscards(self):
+        '''Called when the shoe runs out in the middle of a round. The cards dealt in earlier rounds (before roundStart, which
+        reshuffleIfNeeded sets at the start of every round) are returned to the undealt part of the shoe, while the cards of this
+        round stay dealt, as they are still in the hands of the players. Returns the new cursor'''
+        if self.roundStart == 0:
+            raise ValueError('The shoe ran out of cards in the middle of a round, every card is in play')
+        shoe = self.shoe
+        shoe[:] = shoe[self.roundStart:self.cursor] + shoe[:self.roundStart]
+        self.cursor = self.cursor - self.roundStart
+        self.roundStart = 0
+        self.recalculateCounts()
+        return self.cursor
+
+    def copyShoe(self):
+        # Takes a copy of a shoe shared with a fork, before the first card is drawn from it
+        self.shoe = array('B', self.shoe)
+        self.shoeShared = False
+
+    def fork(self, seed = None):
+        '''Returns a copy of the Deck with the same cards left, which shares the shoe with this Deck until either of them draws a
+        card (copy on write). Without a seed the copy has a copy of the random number generator, so it draws the same cards as
+        this Deck would, with a seed it draws different cards from the cards left'''
+        deck = object.__new__(type(self))
+        deck.__dict__.update(self.__dict__)
+        deck.remainingCounts = list(self.remainingCounts)
+        deck.drawListener = None
+        if seed is None:
+            # Random() would first seed itself from the operating system, only to be replaced by the copied state
+            deck.rng = random.Random.__new__(random.Random)
+            deck.rng.setstate(self.rng.getstate())
+        else:
+            deck.rng = random.Random(seed)
+
+        self.shoeShared = deck.shoeShared = True
+        return deck
+
+    def countCard(self, code):
+        # Removes a card that has been dealt from the index of the cards left
+        value = self.cardTable[code].value
+        self.remainingCounts[value - 1] -= 1
+        self.runningCount += self.hiLoValues[value]
+        self.remainingValue -= value
+
+    def resetCounts(self):
+        # Index of a full shoe
+        self.remainingCounts = list(self.fullShoeCounts)
+        self.runningCount = 0
+        self.remainingValue = self.fullShoeValue
+
+    def recalculateCounts(self):
+        # Rebuilds the index from the cards left in the shoe, for when the shoe or cursor are changed directly
+        self.resetCounts()
+        for code in self.shoe[:self.cursor]:
+            self.countCard(code)
+
+    def getRemainingCount(self, value):
+        # Number of cards with the given value (1 for Aces, 10 for 10, J, Q and K) that have not been dealt
+        return self.remainingCounts[value - 1]
+
+    def getComposition(self):
+        # Number of cards left of every value as a tuple, index 0 is the number of Aces and index 9 the number of 10s
+        return tuple(self.remainingCounts)
+
+    def getRemainingCards(self):
+        return len(self.shoe) - self.cursor
+
+    def getRunningCount(self):
+        return self.runningCount
+
+    def getTrueCount(self):
+        # Running count per deck left in the shoe
+        decksLeft = self.getRemainingCards() / 52
+        return self.runningCount / decksLeft if decksLeft else 0.0
+
+    def getRemainingValue(self):
+        return self.remainingValue
+
+    def needsReshuffle(self):
+        # Returns True once the cut card has been reached, for games that keep using the same shoe across rounds
+        return self.cursor >= self.cutCard
+
+    def reshuffleIfNeeded(self):
+        # Called before dealing a round, for games that keep using the same shoe across rounds
+        if self.needsReshuffle():
+            self.resetDeck()
+        self.roundStart = self.cursor
+
+    def resetDeck(self):
+        # Function to reset the Deck, the undealt part of the shoe is always in random order so every card can be returned by moving the cursor
+        self.cursor = 0
+        self.roundStart = 0
+        self.resetCounts()
+
+
+class Player():
+    '''Player Class that contains player's cards for the current game, with method getPrintHand to print all cards currently in hand
+    Acts as Parent Class to UserPlayer and BotPlayer'''
+
+    def __init__(self):
+        self.clearHand()
+
+    def addCard(self, cardObject):
+        # Keep a running total of the hand, counting every Ace as 1, so that handValue does not need to go through every card
+        self.handCards.append(cardObject)
+        cardValue = cardObject.getValue()
+        self.hardTotal += cardValue
+        if cardValue == 1:
+            self.containsAce = True
+
+    def clearHand(self):
+        self.handCards = []
+        self.hardTotal = 0
+        self.containsAce = False
+
+        # Reset the rows used by getPrintHand, blank array of 7 empty strings
+        self.printRows = ['' for i in range(7)]
+        self.printedCardCount = 0
+        self.printedHand = '\n' * 6
+
+    def handValue(self):
+        # Since the maximum number of Aces in a hand with the value 11 can only be 1, since 2 Aces with 11 automatically busts you at 22,
+        # Then we only need to check if one of the Aces needs to be converted into an 11
+        if self.containsAce and self.hardTotal <= 11:
+            return self.hardTotal + 10 # Ace is converted from 1 to 11, add 10 to value
+        return self.hardTotal
+
+    def isSoft(self):
+        # Returns True if one of the Aces in the hand is currently counted as 11
+        return self.containsAce and self.hardTotal <= 11
+
+    def getPrintHand(self):
+        # The 7 rows of the hand are kept between calls, and only the columns of cards added since the last call are appended to them
+        if self.printedCardCount < len(self.handCards):
+            printRows = self.printRows
+            for card in self.handCards[self.printedCardCount:]:
+                cardArray = card.getCardArrayForPrint()
+                for i in range(7):
+                    printRows[i] += cardArray[i] + ' '
+
+            self.printedCardCount = len(self.handCards)
+            delimiter = '\n'
+            self.printedHand = delimiter.join(printRows)
+
+        return self.printedHand
+
+
+class UserPlayer(Player):
+    '''Child class of Player with attributes and methods to contain and modify UserPlayer's tokens. If a TokenLedger (ledger.py)
+    is attached, every change in tokens is also recorded in the ledger'''
+    def __init__(self, tokens = 1000):
+        self.tokens = tokens
+        self.ledger = None
+        self.playerId = None
+        Player.__init__(self)
+
+    def getTokens(self):
+        return self.tokens
+
+    def winTokens(self, amt, reason = 'win'):
+        self.tokens += amt
+        if self.ledger is not None:
+            self.ledger.record(self.playerId, amt, self.tokens, reason)
+
+    def loseTokens(self, amt, reason = 'loss'):
+        self.tokens -= amt
+        if self.ledger is not None:
+            self.ledger.record(self.playerId, -amt, self.tokens, reason)
+
+class BotPlayer(Player):
+    '''Child Class of Player which contains the bot's Name, and also a method to print out a concealed hand.
+    Bots draw until a hand value of 17, unless they are given a BotPolicy (policies.py)'''
+
+    # Rows of a card lying face down, shared by every Bot, with the space that separates cards in a hand
+    hiddenCard = ( '┌───────┐', \
+                  f'│░░░░░░░|', \
+                   '│░░░░░░░│', \
+                  f'|░░░░░░░|', \
+                   '│░░░░░░░│', \
+                  f'│░░░░░░░|', \
+                   '└───────┘'
+    )
+    hiddenCardRows = tuple(row + ' ' for row in hiddenCard)
+
+    botNamesList = ["WALL-E", "DEEP LEARNING", "MACHINE LEARNING", "DAVE", "INTEL I-7", \
+        "APE", "ISTD", "HASS", "ESD", "EPD", "INTRO TO DESIGN 3.007", "VOCAREUM", "E-DIMENSION", "MYPORTAL", "#BIG-D", "DESIGN THINKING"]
+
+    def __init__(self, name, policy = None):
+        self.name = name
+        self.policy = policy
+        Player.__init__(self)
+
+    def getBotName(self):
+        return self.name
+
+    def shouldDraw(self, playersRemaining, deck):
+        # playersRemaining is the number of players (Bots or the User) that still have to play after this Bot
+        if self.policy is None:
+            return self.handValue() < 17
+        return self.policy.shouldDraw(self, playersRemaining, deck)
+
+    def clearHand(self):
+        Player.clearHand(self)
+        self.concealedCardCount = 0
+        self.concealedHand = None
+
+    def getConcealedHand(self):
+        # Only the first card is shown, the rest of the row is the same hidden card repeated, so each row is built with a single join
+        if self.concealedCardCount != len(self.handCards):
+            firstCard = self.handCards[0].getCardArrayForPrint()
+            noOfHiddenCards = len(self.handCards) - 1
+            hiddenCardRows = self.hiddenCardRows
+
+            finalList = [firstCard[i] + ' ' + hiddenCardRows[i] * noOfHiddenCards for i in range(7)]
+
+            self.concealedCardCount = len(self.handCards)
+            delimiter = '\n'
+            self.concealedHand = delimiter.join(finalList)
+
+        return self.concealedHand
+
+
+def getWinnersList(handValueList):
+    '''Takes in a list of hand values (User first, followed by each Bot) and returns a list of (player, handValue) tuples
+    for the player(s) with the highest hand value of 21 or below. Returns an empty list if every player has busted'''
+    maxWinningValue = 0
+    winnersList = []
+    for player, number in enumerate(handValueList):
+        if number > maxWinningValue and number <= 21:
+            maxWinningValue = number
+            winnersList = [(player, number)]
+        elif number == maxWinningValue:
+            nextWinner = (player, number)
+            winnersList.append(nextWinner)
+
+    return winnersList
+
+
+def getTokenChange(winnersList, player, tokenBet, noOfPlayers):
+    '''Returns the change in Tokens of a player (0 for the User) at the end of a round, where every player bet tokenBet. The
+    winners share the pool of tokenBet * noOfPlayers, every other player loses the bet, and if every player has busted,
+    everyone gets their Tokens back'''
+    if len(winnersList) == 0:
+        return 0
+    for winner, handValue in winnersList:
+        if winner == player:
+            return (tokenBet * noOfPlayers) // len(winnersList) - tokenBet
+    return -tokenBet
@@ -0,0 +1,177 @@
+'''Compact store of the hands of many AI Mode rounds, for keeping hand histories of millions of rounds. Every round is a record
+of fixed size in one contiguous NumPy buffer, which can be memory-mapped to a .npy file: the tokenBet of the round, followed by
+a byte for every card of every seat. A card is stored as its code in Deck.cardTable plus 1, so that 0 is an empty slot.
+
+Seats are in the same order as the handValueList of 'AI Loop', the User first followed by the Bots, so the hand values of a
+range of rounds can be passed straight to batchSettle (settlement.py). Card objects are only created when a hand is rendered'''
+
+import os
+import struct
+
+import numpy as np
+
+from engine import MAX_PLAYERS_REMAINING, Deck, Player
+from settlement import batchSettle
+
+MAX_SEATS = MAX_PLAYERS_REMAINING + 1 # The User and up to 6 Bots
+
+EMPTY = 0 # Byte of a slot without a card
+betStruct = struct.Struct('<I') # tokenBet at the start of every record
+
+# Byte stored for every shared Card object, and the value of every byte (0 for an empty slot)
+cardBytes = {card: code + 1 for code, card in enumerate(Deck.cardTable)}
+getCardByte = cardBytes.__getitem__
+cardValues = np.zeros(256, dtype = np.uint8)
+cardValues[1:len(Deck.cardTable) + 1] = [card.value for card in Deck.cardTable]
+
+
+def getMaxCards(noOfDecks = 1):
+    '''Most cards a hand can hold when dealt from a shoe of noOfDecks decks: the lowest cards of the shoe up to a hard total of
+    21, and one more card, which busts. 12 for a single deck (4 Aces, 4 2s and 3 3s, then any card), and 22 from 6 decks on'''
+    hardTotal = 0
+    noOfCards = 0
+    for value in range(1, 10):
+        for copy in range(4 * noOfDecks):
+            if hardTotal + value > 21:
+                return noOfCards + 1
+            hardTotal += value
+            noOfCards += 1
+
+
+def getRecordType(noOfSeats = MAX_SEATS, maxCards = None):
+    if maxCards is None:
+        maxCards = getMaxCards()
+    return np.dtype([('tokenBet', '<u4'), ('cards', 'u1', (noOfSeats, maxCards))])
+
+
+def getHandValues(cards):
+    '''Hand values of an array of hands in the store's format, with the cards of a hand along the last axis (such as a view
+    returned by HandStore.getCards). Calculated in the same way as Player.handValue, an empty hand has the value 0'''
+    values = cardValues[cards]
+    hardTotals = values.sum(axis = -1, dtype = np.int16)
+    soft = (values == 1).any(axis = -1) & (hardTotals <= 11)
+    return np.where(soft, hardTotals + 10, hardTotals)
+
+
+class HandStore():
+    '''Preallocated store for the hands of capacity rounds with up to noOfSeats players and maxCards cards per hand. By default,
+    maxCards is the most cards a hand can hold when dealt from a shoe of noOfDecks decks (see getMaxCards). If a path is given, the store is a memory-mapped .npy file, which is created if it does not exist yet and otherwise opened to add more
+    rounds after the ones already in it. Contains methods addRound, getCards, getBets, getHandValues, settle, getHand, getPlayer
+    and flush'''
+
+    def __init__(self, capacity, noOfSeats = MAX_SEATS, maxCards = None, path = None, noOfDecks = 1):
+        if maxCards is None:
+            maxCards = getMaxCards(noOfDecks)
+        self.path = path
+        if path is None:
+            self.records = np.zeros(capacity, dtype = getRecordType(noOfSeats, maxCards))
+            self.noOfRounds = 0
+        elif os.path.exists(path):
+            self.records = np.lib.format.open_memmap(path, mode = 'r+')
+            # Rounds are added in order and the User always has cards, so the stored rounds are the ones where the User has a card
+            self.noOfRounds = int(np.count_nonzero(self.records['cards'][:, 0, 0]))
+        else:
+            self.records = np.lib.format.open_memmap(path, mode = 'w+', dtype = getRecordType(noOfSeats, maxCards), shape = (capacity,))
+            self.noOfRounds = 0
+
+        self.capacity, = self.records.shape
+        self.noOfSeats, self.maxCards = self.records.dtype['cards'].shape
+        self.recordSize = self.records.dtype.itemsize
+
+        # Rounds are written through a flat view of the buffer, as writing a whole record of bytes at once is much faster than
+        # setting every card in the array
+        self.buffer = memoryview(self.records.view(np.uint8).reshape(-1))
+        self.emptyHand = bytes(self.maxCards)
+
+    def __len__(self):
+        return self.noOfRounds
+
+    def addRound(self, players, tokenBet = 0):
+        # Stores the hands of players (the User followed by the Bots) and the tokenBet of a round, returns the number of the round
+        if self.noOfRounds >= self.capacity:
+            raise IndexError(f'HandStore is full, it has room for {self.capacity} rounds')
+        if len(players) > self.noOfSeats:
+            raise ValueError(f'HandStore has {self.noOfSeats} seats, not {len(players)}')
+
+        maxCards = self.maxCards
+        cardBytesOfRound = []
+        for player in players:
+            handCards = player.handCards
+            if len(handCards) > maxCards:
+                raise ValueError(f'A hand of {len(handCards)} cards does not fit in {maxCards} cards, use a larger maxCards or noOfDecks')
+            cardBytesOfRound.extend(map(getCardByte, handCards))
+            cardBytesOfRound.extend(self.emptyHand[len(handCards):])
+        cardBytesOfRound.extend(self.emptyHand * (self.noOfSeats - len(players)))
+
+        offset = self.noOfRounds * self.recordSize
+        betStruct.pack_into(self.buffer, offset, tokenBet)
+        self.buffer[offset + betStruct.size:offset + self.recordSize] = bytes(cardBytesOfRound)
+        self.noOfRounds += 1
+        return self.noOfRounds - 1
+
+    def getCards(self, start = 0, stop = None):
+        # View (not a copy) of the cards of the rounds from start to stop, with the shape (rounds, noOfSeats, maxCards)
+        return self.records['cards'][start:self.noOfRounds if stop is None else stop]
+
+    def getBets(self, start = 0, stop = None):
+        return self.records['tokenBet'][start:self.noOfRounds if stop is None else stop]
+
+    def getHandValues(self, start = 0, stop = None):
+        # Hand values of every seat of the rounds from start to stop, with 0 for the empty seats
+        return getHandValues(self.getCards(start, stop))
+
+    def settle(self, start = 0, stop = None):
+        # Settles the rounds from start to stop with batchSettle, returns (winners, payouts)
+        return batchSettle(self.getHandValues(start, stop), self.getBets(start, stop))
+
+    def getHand(self, roundNumber, seat):
+        # Converts a stored hand back into the shared Card objects of Deck.cardTable
+        return [Deck.cardTable[cardByte - 1] for cardByte in self.records['cards'][roundNumber, seat].tolist() if cardByte != EMPTY]
+
+    def getPlayer(self, roundNumber, seat):
+        # Player holding a stored hand, to print it with getPrintHand
+        player = Player()
+        for card in self.getHand(roundNumber, seat):
+            player.addCard(card)
+        return player
+
+    def flush(self):
+        # Writes the rounds added to a memory-mapped store to its file
+        if self.path is not None:
+            self.records.flush()
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from simulator import RoundSimulator
+
+    parser = argparse.ArgumentParser(description = 'Simulate AI Mode rounds into a HandStore, and settle every stored round at once')
+    parser.add_argument('rounds', type = int, nargs = '?', default = 100000)
+    parser.add_argument('--bots', type = int, default = 3, choices = range(1, 7))
+    parser.add_argument('--bet', type = int, default = 100)
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--decks', type = int, default = 1, choices = range(1, Deck.maxNoOfDecks + 1))
+    parser.add_argument('--penetration', type = float, default = None, help = 'keep the shoe across rounds until this fraction is dealt')
+    parser.add_argument('--path', default = None, help = 'memory-map the store to this .npy file')
+    parser.add_argument('--show', type = int, default = None, help = 'print the hands of this round')
+    args = parser.parse_args()
+
+    handStore = HandStore(args.rounds, args.bots + 1, path = args.path, noOfDecks = args.decks)
+    simulator = RoundSimulator(args.bots, args.bet, seed = args.seed, noOfDecks = args.decks, penetration = args.penetration, \
+        handStore = handStore)
+    results = simulator.simulate(args.rounds)
+    handStore.flush()
+    print(results.getSummary())
+
+    startTime = time.perf_counter()
+    winners, payouts = handStore.settle()
+    elapsed = time.perf_counter() - startTime
+    print(f"\nSettled {len(handStore)} stored rounds in {elapsed * 1000:.1f}ms, {handStore.recordSize} bytes per round")
+    print(f"User token change from the store: {int(payouts[:, 0].sum())}, from the simulator: {results.tokenChange}")
+
+    if args.show is not None:
+        for seat in range(handStore.noOfSeats):
+            print(f"\n{'User' if seat == 0 else f'Bot {seat}'}: {int(handStore.getHandValues(args.show, args.show + 1)[0, seat])}")
+            print(handStore.getPlayer(args.show, seat).getPrintHand())
@@ -0,0 +1,189 @@
+'''Input sources for GameSM, to play sessions without a console. Any function that takes in the game and returns the next line
+of input can be given to GameSM as its inputSource, and raising EOFError ends the session, the same as input() at the end of
+stdin. This module has three kinds of input sources:
+
+    ScriptedInput   a sequence of lines, such as a list
+    PolicyInput     a function that decides every line from the state of the game, such as StandOnPolicy
+    readSessions    a generator of a ScriptedInput for every session in a (large) file, where sessions are separated by ---
+
+runSessions plays many sessions through the unmodified GameSM at full speed, without any pauses or output'''
+
+import io
+import random
+import time
+from contextlib import redirect_stdout
+
+from blackjack import GameSM
+from pacing import NoDelayClock
+
+SESSION_SEPARATOR = '---'
+
+
+class ScriptedInput():
+    '''Input source that returns the lines of a sequence in order, and raises EOFError once they have all been used'''
+
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.linesUsed = 0
+
+    def __call__(self, game):
+        for line in self.lines:
+            self.linesUsed += 1
+            return line
+        raise EOFError('No more scripted input')
+
+
+class PolicyInput():
+    '''Input source that asks policy(game, promptNumber) for every line of input. promptNumber counts the lines read since the
+    game entered its current state, so prompts within the same state can be told apart ('AI' first asks for the number of
+    Bots, then for the bet). The policy can raise EOFError to end the session'''
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.lastState = None
+        self.promptNumber = 0
+
+    def __call__(self, game):
+        if game.state != self.lastState:
+            self.lastState = game.state
+            self.promptNumber = 0
+        line = self.policy(game, self.promptNumber)
+        self.promptNumber += 1
+        return line
+
+
+class StandOnPolicy():
+    '''Policy that plays rounds of AI Mode against noOfBots Bots, betting tokenBet (limited to what the game allows), and quits
+    once rounds rounds have been played. The User draws until the hand value reaches standValue, or follows advisor.shouldHit
+    if a HitStandAdvisor (advisor.py) is given'''
+
+    def __init__(self, noOfBots = 3, tokenBet = 100, standValue = 17, rounds = 1, advisor = None):
+        self.noOfBots = noOfBots
+        self.tokenBet = tokenBet
+        self.standValue = standValue
+        self.rounds = rounds
+        self.advisor = advisor
+        self.roundsPlayed = 0
+
+    def __call__(self, game, promptNumber):
+        if game.state == 'Start Screen':
+            if self.roundsPlayed < self.rounds:
+                self.roundsPlayed += 1
+                return '2'
+            return '3'
+
+        if game.state == 'AI':
+            if promptNumber == 0:
+                return str(self.noOfBots)
+            # The Start Screen has already topped up the User, so there are always at least 100 tokens to bet
+            return str(max(100, min(self.tokenBet, 500, game.player.getTokens())))
+
+        if game.state in ('AI Loop', 'Practice', 'Practice Loop'):
+            if self.advisor is not None:
+                return 'Y' if self.advisor.shouldHit(game) else 'N'
+            return 'Y' if game.player.handValue() < self.standValue else 'N'
+
+        # 'Start-Over User Dialog (Practice)', go back to the Start Screen
+        return 'N'
+
+
+def readSessions(path, separator = SESSION_SEPARATOR):
+    '''Generator that yields a ScriptedInput for every session in a file of input lines, where sessions are separated by a line
+    containing only the separator. The file is read one line at a time while the sessions are played, so files of any size can
+    be used. Lines of a session that were not used by the game are skipped'''
+    with open(path) as sessionFile:
+
+        def readSessionLines(line):
+            while line and line.rstrip('\n') != separator:
+                yield line.rstrip('\n')
+                line = sessionFile.readline()
+
+        while True:
+            firstLine = sessionFile.readline()
+            if not firstLine:
+                break
+            sessionLines = readSessionLines(firstLine)
+            yield ScriptedInput(sessionLines)
+            for line in sessionLines:
+                pass
+
+
+def runSession(game, showOutput = False):
+    '''Plays a started game until the User quits or the input source runs out of input (EOFError), returns the number of steps
+    and whether the User quit the game'''
+    output = None if showOutput else io.StringIO()
+    steps = 0
+    gameStillOn = True
+    try:
+        while gameStillOn:
+            if output is None:
+                gameStillOn = game.step(True)
+            else:
+                with redirect_stdout(output):
+                    gameStillOn = game.step(True)
+                output.seek(0)
+                output.truncate()
+            steps += 1
+    except EOFError:
+        return steps, False
+    return steps, True
+
+
+def runSessions(inputSources, seed = None, showOutput = False, recorder = None, instrumentation = None):
+    '''Plays a session through a new GameSM for every input source, with a NoDelayClock and without a console. The Deck of every
+    session gets its own seed, derived from seed. A RoundRecorder (roundlog.py) or GameInstrumentation (instrumentation.py) can
+    be attached to every game. Returns a report of the sessions played'''
+    seedGenerator = random.Random(seed)
+    report = {'sessions': 0, 'quitSessions': 0, 'steps': 0, 'finalTokens': []}
+    startTime = time.perf_counter()
+
+    for inputSource in inputSources:
+        game = GameSM(seedGenerator.getrandbits(64), NoDelayClock(), inputSource = inputSource, console = False)
+        if recorder is not None:
+            recorder.attach(game)
+        if instrumentation is not None:
+            instrumentation.attach(game)
+        game.start()
+
+        steps, quit = runSession(game, showOutput)
+        report['sessions'] += 1
+        report['quitSessions'] += quit
+        report['steps'] += steps
+        report['finalTokens'].append(game.player.getTokens())
+
+    report['elapsed'] = time.perf_counter() - startTime
+    report['sessionsPerSecond'] = report['sessions'] / report['elapsed'] if report['elapsed'] else 0.0
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description = 'Play sessions of the game from a file of input lines, or with a policy')
+    parser.add_argument('path', nargs = '?', default = None, help = f'file of input lines, sessions separated by {SESSION_SEPARATOR}')
+    parser.add_argument('--sessions', type = int, default = 1000, help = 'sessions played with StandOnPolicy if no path is given')
+    parser.add_argument('--rounds', type = int, default = 5, help = 'AI Mode rounds played in each StandOnPolicy session')
+    parser.add_argument('--bots', type = int, default = 3, choices = range(1, 7))
+    parser.add_argument('--bet', type = int, default = 100)
+    parser.add_argument('--stand', type = int, default = 17)
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--show-output', action = 'store_true')
+    parser.add_argument('--record', default = None, help = 'round log (roundlog.py) to record the sessions to')
+    args = parser.parse_args()
+
+    if args.path is not None:
+        inputSources = readSessions(args.path)
+    else:
+        inputSources = (PolicyInput(StandOnPolicy(args.bots, args.bet, args.stand, args.rounds)) for session in range(args.sessions))
+
+    recorder = None
+    if args.record is not None:
+        from roundlog import RoundRecorder
+        recorder = RoundRecorder(args.record)
+
+    report = runSessions(inputSources, args.seed, args.show_output, recorder)
+    if recorder is not None:
+        recorder.close()
+
+    print(f"{report['sessions']} sessions ({report['quitSessions']} quit by the User), {report['steps']} steps in {report['elapsed']:.2f}s")
+    print(f"{report['sessionsPerSecond']:.1f} sessions/sec")
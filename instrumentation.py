@@ -0,0 +1,152 @@
+import json
+import time
+from bisect import bisect_left
+
+from pacing import PacingClock
+
+
+class Histogram():
+    '''Histogram of durations in seconds, with buckets that double in size from 1 microsecond up to about 36 minutes.
+    Contains methods add, getPercentile and snapshot'''
+
+    bucketBounds = [1e-6 * 2 ** power for power in range(32)]
+
+    def __init__(self):
+        self.bucketCounts = [0] * (len(self.bucketBounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        self.bucketCounts[bisect_left(self.bucketBounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def getPercentile(self, percentile):
+        # Returns the upper bound of the bucket that contains the given percentile (between 0 and 100)
+        if self.count == 0:
+            return 0.0
+        target = self.count * percentile / 100
+        runningCount = 0
+        for bucket, bucketCount in enumerate(self.bucketCounts):
+            runningCount += bucketCount
+            if runningCount >= target:
+                return self.bucketBounds[bucket] if bucket < len(self.bucketBounds) else self.maximum
+        return self.maximum
+
+    def snapshot(self):
+        return {'count': self.count, 'totalSeconds': self.total, 'maxSeconds': self.maximum,
+                'p50Seconds': self.getPercentile(50), 'p99Seconds': self.getPercentile(99),
+                'buckets': {f'{self.bucketBounds[bucket]:.6g}' if bucket < len(self.bucketBounds) else 'inf': bucketCount \
+                            for bucket, bucketCount in enumerate(self.bucketCounts) if bucketCount}}
+
+
+class TimedClock(PacingClock):
+    '''Wraps the clock of an instrumented GameSM, to measure how long each step spends pausing'''
+
+    def __init__(self, clock, instrumentation):
+        self.clock = clock
+        self.instrumentation = instrumentation
+
+    def pause(self, seconds):
+        startTime = time.perf_counter()
+        self.clock.pause(seconds)
+        self.instrumentation.pausedSeconds += time.perf_counter() - startTime
+
+
+class StateStatistics():
+    '''Statistics of a single state of GameSM'''
+
+    def __init__(self):
+        self.entries = 0
+        self.cardsDrawn = 0
+        self.stepTime = Histogram() # Time spent in the state, without pauses and waiting for input
+        self.inputWait = Histogram() # Time spent waiting for input in the state
+
+    def snapshot(self):
+        return {'entries': self.entries, 'cardsDrawn': self.cardsDrawn, 'stepTime': self.stepTime.snapshot(), \
+                'inputWait': self.inputWait.snapshot()}
+
+
+class GameInstrumentation():
+    '''Opt-in instrumentation of GameSM. Once attached to a game, every step records the number of times each state is
+    entered, the time spent in the state (without pauses from the clock and without waiting for input), the cards drawn and
+    the time spent waiting for input. When no instrumentation is attached, GameSM.step only checks that the attribute
+    instrumentation is None. One GameInstrumentation can be attached to many games, to collect statistics of all of them.
+
+    If exportPath is given, a snapshot is appended to that file as a line of JSON every exportInterval seconds'''
+
+    def __init__(self, exportPath = None, exportInterval = 60):
+        self.stateStatistics = {}
+        self.pausedSeconds = 0.0
+        self.inputWaitSeconds = 0.0
+        self.exportPath = exportPath
+        self.exportInterval = exportInterval
+        self.lastExportTime = time.monotonic()
+
+    def attach(self, game):
+        game.clock = TimedClock(game.clock, self)
+        game.instrumentation = self
+
+    def detach(self, game):
+        if isinstance(game.clock, TimedClock):
+            game.clock = game.clock.clock
+        game.instrumentation = None
+
+    def getStateStatistics(self, state):
+        if state not in self.stateStatistics:
+            self.stateStatistics[state] = StateStatistics()
+        return self.stateStatistics[state]
+
+    def recordStep(self, game, step, inp):
+        # Called by GameSM.step with the uninstrumented step function
+        statistics = self.getStateStatistics(game.state)
+        pausedBefore = self.pausedSeconds
+        inputWaitBefore = self.inputWaitSeconds
+        cardsBefore = game.deck.noOfCardsDrawn
+        startTime = time.perf_counter()
+
+        try:
+            return step(game, inp)
+        finally:
+            elapsed = time.perf_counter() - startTime
+            inputWait = self.inputWaitSeconds - inputWaitBefore
+            statistics.entries += 1
+            statistics.cardsDrawn += game.deck.noOfCardsDrawn - cardsBefore
+            statistics.stepTime.add(max(0.0, elapsed - (self.pausedSeconds - pausedBefore) - inputWait))
+            statistics.inputWait.add(inputWait)
+            if self.exportPath is not None and time.monotonic() - self.lastExportTime >= self.exportInterval:
+                self.exportSnapshot()
+
+    def recordInput(self, readInput):
+        # Called by GameSM.readInput with the function that reads the input
+        startTime = time.perf_counter()
+        try:
+            return readInput()
+        finally:
+            self.inputWaitSeconds += time.perf_counter() - startTime
+
+    def snapshot(self):
+        return {'time': time.time(), 'pausedSeconds': self.pausedSeconds, 'inputWaitSeconds': self.inputWaitSeconds, \
+                'states': {state: statistics.snapshot() for state, statistics in self.stateStatistics.items()}}
+
+    def exportSnapshot(self, path = None):
+        # Appends a snapshot to path (or exportPath) as a single line of JSON
+        self.lastExportTime = time.monotonic()
+        with open(path or self.exportPath, 'a') as exportFile:
+            exportFile.write(json.dumps(self.snapshot()) + '\n')
+
+    def getSummary(self):
+        # Returns a table of the statistics of every state
+        lines = [f"{'State':^35}|{'Entries':^9}|{'Cards':^7}|{'Avg Step (ms)':^15}|{'p99 Step (ms)':^15}|{'Input Wait (s)':^16}"]
+        lines.append('-' * 102)
+        for state, statistics in self.stateStatistics.items():
+            stepTime = statistics.stepTime
+            averageStep = stepTime.total / stepTime.count * 1000 if stepTime.count else 0.0
+            lines.append(f"{state:^35}|{statistics.entries:^9}|{statistics.cardsDrawn:^7}|{averageStep:^15.3f}|"
+                f"{stepTime.getPercentile(99) * 1000:^15.3f}|{statistics.inputWait.total:^16.2f}")
+
+        delimiter = '\n'
+        return delimiter.join(lines)
@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+import time
+
+
+class TokenLedger():
+    '''Durable record of every change in the tokens of UserPlayers, stored in an SQLite database in WAL mode.
+
+    Changes are kept in memory and written in batches, in a single transaction, once batchSize changes are waiting or
+    flushInterval seconds have passed since the last write. A background thread writes the waiting changes every flushInterval
+    seconds, so a change is never kept in memory for longer than that, even if no other change follows it. Every change is stored in the table entries, and the table balances
+    keeps the latest balance of every player, so a player's tokens can be loaded on startup with a single lookup instead of
+    going through the whole history. One ledger can be shared by many games and threads'''
+
+    def __init__(self, path, batchSize = 1000, flushInterval = 0.5):
+        self.connection = sqlite3.connect(path, isolation_level = None, check_same_thread = False)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, playerId TEXT NOT NULL,
+                                   change INTEGER NOT NULL, balance INTEGER NOT NULL, reason TEXT NOT NULL, time REAL NOT NULL)''')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS balances (playerId TEXT PRIMARY KEY, balance INTEGER NOT NULL)''')
+
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+        self.pendingEntries = []
+        self.pendingBalances = {}
+        self.lastFlushTime = time.monotonic()
+        self.lock = threading.Lock()
+
+        self.closed = threading.Event()
+        self.flushThread = threading.Thread(target = self.flushPeriodically, daemon = True)
+        self.flushThread.start()
+
+    def attach(self, player, playerId, startingTokens = None):
+        '''Records every change in the tokens of a UserPlayer under playerId. If the ledger already has a balance for playerId,
+        the player's tokens are set to it, otherwise the player's current tokens (or startingTokens) are recorded as the start'''
+        balance = self.getBalance(playerId)
+        if balance is None:
+            if startingTokens is not None:
+                player.tokens = startingTokens
+            self.record(playerId, player.tokens, player.tokens, 'start')
+        else:
+            player.tokens = balance
+
+        player.ledger = self
+        player.playerId = playerId
+
+    def record(self, playerId, change, balance, reason):
+        with self.lock:
+            self.pendingEntries.append((playerId, change, balance, reason, time.time()))
+            self.pendingBalances[playerId] = balance
+            if len(self.pendingEntries) < self.batchSize and time.monotonic() - self.lastFlushTime < self.flushInterval:
+                return
+            self.writePending()
+
+    def flush(self):
+        with self.lock:
+            self.writePending()
+
+    def flushPeriodically(self):
+        # Runs in the background thread until the ledger is closed
+        while not self.closed.wait(self.flushInterval):
+            if self.pendingEntries:
+                self.flush()
+
+    def writePending(self):
+        # Writes every waiting change in one transaction, the lock has to be held by the caller
+        self.lastFlushTime = time.monotonic()
+        if not self.pendingEntries:
+            return
+
+        self.connection.execute('BEGIN')
+        try:
+            self.connection.executemany('INSERT INTO entries (playerId, change, balance, reason, time) VALUES (?, ?, ?, ?, ?)', \
+                self.pendingEntries)
+            self.connection.executemany('INSERT INTO balances (playerId, balance) VALUES (?, ?) ' \
+                'ON CONFLICT (playerId) DO UPDATE SET balance = excluded.balance', self.pendingBalances.items())
+            self.connection.execute('COMMIT')
+        except sqlite3.Error:
+            self.connection.execute('ROLLBACK')
+            raise
+
+        self.pendingEntries = []
+        self.pendingBalances = {}
+
+    def getBalance(self, playerId):
+        # Returns the latest balance of playerId, or None if the ledger has no record of the player
+        with self.lock:
+            if playerId in self.pendingBalances:
+                return self.pendingBalances[playerId]
+            row = self.connection.execute('SELECT balance FROM balances WHERE playerId = ?', (playerId,)).fetchone()
+        return None if row is None else row[0]
+
+    def getHistory(self, playerId):
+        # Returns every (change, balance, reason, time) of playerId, oldest first
+        self.flush()
+        return self.connection.execute('SELECT change, balance, reason, time FROM entries WHERE playerId = ? ORDER BY id', \
+            (playerId,)).fetchall()
+
+    def rebuildBalances(self):
+        # Recalculates the balances table from the entries, in case it ever has to be repaired
+        with self.lock:
+            self.writePending()
+            self.connection.execute('BEGIN')
+            self.connection.execute('DELETE FROM balances')
+            self.connection.execute('''INSERT INTO balances (playerId, balance) SELECT playerId, balance FROM entries
+                                       WHERE id IN (SELECT MAX(id) FROM entries GROUP BY playerId)''')
+            self.connection.execute('COMMIT')
+
+    def close(self):
+        self.closed.set()
+        self.flushThread.join()
+        self.flush()
+        self.connection.close()
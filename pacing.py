@@ -0,0 +1,56 @@
+import time
+
+class PacingClock():
+    '''Parent Class of the clocks that GameSM uses to pause between messages, so that the game can be played at different speeds.
+    Contains method pause, which is called with the number of seconds the interactive game would pause for'''
+
+    def pause(self, seconds):
+        raise NotImplementedError
+
+
+class InteractiveClock(PacingClock):
+    '''Clock used when playing in the console, pauses for the full number of seconds'''
+
+    def pause(self, seconds):
+        time.sleep(seconds)
+
+
+class ScaledClock(PacingClock):
+    '''Clock that pauses speedUp times shorter than the interactive game, Eg. speedUp = 10 turns a pause of 1 second into 0.1 seconds'''
+
+    def __init__(self, speedUp = 10):
+        if speedUp <= 0:
+            raise ValueError('speedUp must be larger than 0')
+        self.speedUp = speedUp
+
+    def pause(self, seconds):
+        time.sleep(seconds / self.speedUp)
+
+
+class NoDelayClock(PacingClock):
+    '''Clock that never pauses, used for automated games'''
+
+    def pause(self, seconds):
+        pass
+
+
+class AsyncClock(PacingClock):
+    '''Clock for games that are run inside an asyncio event loop. GameSM.step cannot wait without blocking the thread, so pause only
+    adds up the pauses of the current step, and the caller awaits settle after each step to yield to the event loop for that long'''
+
+    def __init__(self, speedUp = 1):
+        if speedUp <= 0:
+            raise ValueError('speedUp must be larger than 0')
+        self.speedUp = speedUp
+        self.pendingSeconds = 0.0
+
+    def pause(self, seconds):
+        self.pendingSeconds += seconds
+
+    async def settle(self):
+        # Waits for the pauses added since the last call, without blocking other tasks in the event loop
+        # asyncio is only imported here, as it takes longer to import than the rest of the game
+        import asyncio
+        seconds = self.pendingSeconds / self.speedUp
+        self.pendingSeconds = 0.0
+        await asyncio.sleep(seconds)
@@ -0,0 +1,275 @@
+'''Policies that decide whether a Bot draws another card, and a tournament runner that plays policies against each other.
+
+Every policy is compiled into a flat bytearray with a byte for every (hand value, soft, players remaining) state, so a decision
+during a round is a single lookup. playersRemaining is the number of players (Bots or the User) that still have to play after
+the Bot. Policies are given to GameSM (botPolicy) or RoundSimulator (botPolicies), and are used through BotPlayer.shouldDraw'''
+
+import math
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import MAX_PLAYERS_REMAINING
+from simulator import RoundSimulator, deriveSeed
+
+MAX_HAND_VALUE = 31 # Highest hand value a Bot can reach, a hard 21 followed by a card of 10
+TABLE_SIZE = (MAX_HAND_VALUE + 1) * 2 * (MAX_PLAYERS_REMAINING + 1)
+
+
+def getTableIndex(handValue, soft, playersRemaining):
+    return (handValue * 2 + soft) * (MAX_PLAYERS_REMAINING + 1) + playersRemaining
+
+
+def clearBustStates(table):
+    # Hands above 21 have busted and never draw, their states are the end of the table
+    bustStart = getTableIndex(22, False, 0)
+    table[bustStart:TABLE_SIZE] = bytes(TABLE_SIZE - bustStart)
+    return table
+
+
+class BotPolicy():
+    '''Base class of every Bot policy. Subclasses implement decide(handValue, soft, playersRemaining), which returns True to draw
+    another card. It is called once for every state when the policy is created, and the answers are stored in table, so it
+    can be as slow as needed. Contains methods shouldDraw, save and getName'''
+
+    def __init__(self):
+        self.table = self.compile(self.decide)
+
+    @staticmethod
+    def compile(decide):
+        # Builds the lookup table of a decide function, hands above 21 have busted and never draw
+        table = bytearray(TABLE_SIZE)
+        for handValue in range(22):
+            for soft in (False, True):
+                for playersRemaining in range(MAX_PLAYERS_REMAINING + 1):
+                    table[getTableIndex(handValue, soft, playersRemaining)] = bool(decide(handValue, soft, playersRemaining))
+        return table
+
+    def decide(self, handValue, soft, playersRemaining):
+        raise NotImplementedError
+
+    def shouldDraw(self, botPlayer, playersRemaining, deck):
+        return self.table[(botPlayer.handValue() * 2 + botPlayer.isSoft()) * (MAX_PLAYERS_REMAINING + 1) + playersRemaining]
+
+    def save(self, path):
+        # Saves the lookup table, which can be loaded again as a TablePolicy
+        with open(path, 'wb') as tableFile:
+            tableFile.write(self.table)
+
+    def getName(self):
+        return type(self).__name__
+
+
+class ThresholdPolicy(BotPolicy):
+    '''Draws until the hand value reaches standValue, the default Bots in GameSM are ThresholdPolicy(17)'''
+
+    def __init__(self, standValue = 17):
+        self.standValue = standValue
+        BotPolicy.__init__(self)
+
+    def decide(self, handValue, soft, playersRemaining):
+        return handValue < self.standValue
+
+    def getName(self):
+        return f'Stand on {self.standValue}'
+
+
+class Soft17Policy(BotPolicy):
+    '''Same as ThresholdPolicy, but also draws on a soft hand of standValue (an Ace counted as 11), like a dealer who hits soft 17'''
+
+    def __init__(self, standValue = 17):
+        self.standValue = standValue
+        BotPolicy.__init__(self)
+
+    def decide(self, handValue, soft, playersRemaining):
+        return handValue < self.standValue or (soft and handValue == self.standValue)
+
+    def getName(self):
+        return f'Hit soft {self.standValue}'
+
+
+class TablePolicy(BotPolicy):
+    '''Policy given directly as a lookup table of TABLE_SIZE bytes, for example one that was learned offline or saved with
+    BotPolicy.save. Non-zero bytes draw another card, except in the states of hands above 21, which are cleared when loading'''
+
+    def __init__(self, table, name = 'Table'):
+        if len(table) != TABLE_SIZE:
+            raise ValueError(f'A policy table has to be {TABLE_SIZE} bytes, not {len(table)}')
+        self.name = name
+        self.table = clearBustStates(bytearray(table))
+
+    @classmethod
+    def fromFile(cls, path, name = None):
+        with open(path, 'rb') as tableFile:
+            return cls(tableFile.read(), name or os.path.basename(path))
+
+    def decide(self, handValue, soft, playersRemaining):
+        return self.table[getTableIndex(handValue, soft, playersRemaining)]
+
+    def getName(self):
+        return self.name
+
+
+class CompositionPolicy(BotPolicy):
+    '''Policy that looks at the cards left in the Deck. Soft hands draw below softStandValue, and hard hands draw as long as the
+    chance of busting with the next card is below maxBustProbability. Instead of calculating that chance during the round,
+    a table is compiled for each of noOfBuckets buckets of the share of 10s left in the Deck (from none to only 10s), and the
+    Deck only has to be looked at to find the bucket'''
+
+    # Share of every card value (Ace to 9) in a full deck, without the 10s
+    lowCardShares = tuple(4 / 36 for value in range(1, 10))
+
+    def __init__(self, maxBustProbability = 0.5, softStandValue = 18, noOfBuckets = 21):
+        self.maxBustProbability = maxBustProbability
+        self.softStandValue = softStandValue
+        self.noOfBuckets = noOfBuckets
+        self.table = bytearray()
+        for bucket in range(noOfBuckets):
+            tenShare = bucket / (noOfBuckets - 1)
+            self.table += self.compile(lambda handValue, soft, playersRemaining: self.decideForShare(handValue, soft, tenShare))
+
+    def getBustProbability(self, handValue, tenShare):
+        # Chance that the next card takes a hard hand above 21, when tenShare of the Deck are 10s and the rest are spread evenly
+        bustProbability = tenShare if handValue + 10 > 21 else 0.0
+        for value, share in enumerate(self.lowCardShares, 1):
+            if handValue + value > 21:
+                bustProbability += (1 - tenShare) * share
+        return bustProbability
+
+    def decideForShare(self, handValue, soft, tenShare):
+        if soft:
+            return handValue < self.softStandValue
+        return handValue < 21 and self.getBustProbability(handValue, tenShare) < self.maxBustProbability
+
+    def decide(self, handValue, soft, playersRemaining):
+        # Decision with the share of 10s of a full deck
+        return self.decideForShare(handValue, soft, 16 / 52)
+
+    def getBucket(self, deck):
+        remainingCards = deck.getRemainingCards()
+        if remainingCards == 0:
+            return 0
+        return round(deck.getRemainingCount(10) / remainingCards * (self.noOfBuckets - 1))
+
+    def shouldDraw(self, botPlayer, playersRemaining, deck):
+        index = (botPlayer.handValue() * 2 + botPlayer.isSoft()) * (MAX_PLAYERS_REMAINING + 1) + playersRemaining
+        return self.table[self.getBucket(deck) * TABLE_SIZE + index]
+
+    def getName(self):
+        return f'Composition (bust < {self.maxBustProbability:.0%})'
+
+
+def getWilsonInterval(successes, trials, z = 1.96):
+    # Wilson score interval of a proportion, the 95% confidence interval by default
+    if trials == 0:
+        return (0.0, 1.0)
+    proportion = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (proportion + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(proportion * (1 - proportion) / trials + z * z / (4 * trials * trials)) / denominator
+    return (centre - margin, centre + margin)
+
+
+def playTournamentChunk(arguments):
+    '''Plays one chunk of tournament rounds, used by runTournament in each worker process. The policies take their turns in a
+    different order in every chunk, so that no policy always plays first. Returns (wins, sharedWins, losses) for every policy,
+    in the order of the policies given, and the same for the User'''
+    policies, rotation, rounds, seed, tokenBet, playerStandValue = arguments
+    order = [(rotation + botNumber) % len(policies) for botNumber in range(len(policies))]
+    simulator = RoundSimulator(len(policies), tokenBet, playerStandValue, seed = seed, \
+        botPolicies = [policies[policyNumber] for policyNumber in order])
+    results = simulator.simulate(rounds)
+
+    counts = [None] * len(policies)
+    for botNumber, policyNumber in enumerate(order):
+        counts[policyNumber] = (results.botWins[botNumber], results.botSharedWins[botNumber], results.botLosses[botNumber])
+    counts.append((results.playerWins, results.playerSharedWins, results.playerLosses))
+    return counts
+
+
+class TournamentResults():
+    '''Wins, shared wins and losses of every policy in a tournament, the last entry being the User, who draws to playerStandValue'''
+
+    def __init__(self, names):
+        self.names = names
+        self.rounds = 0
+        self.elapsed = 0.0
+        self.wins = [0] * len(names)
+        self.sharedWins = [0] * len(names)
+        self.losses = [0] * len(names)
+
+    def add(self, rounds, counts):
+        self.rounds += rounds
+        for entry, (wins, sharedWins, losses) in enumerate(counts):
+            self.wins[entry] += wins
+            self.sharedWins[entry] += sharedWins
+            self.losses[entry] += losses
+
+    def getWinRate(self, entry):
+        # Share of rounds won, alone or shared, with its 95% Wilson confidence interval
+        winningRounds = self.wins[entry] + self.sharedWins[entry]
+        return winningRounds / max(self.rounds, 1), getWilsonInterval(winningRounds, self.rounds)
+
+    def getSummary(self):
+        lines = [f"{self.rounds} rounds in {self.elapsed:.2f}s\n"]
+        nameLength = max(len(name) for name in self.names) + 2
+        lines.append(f"{'Policy':^{nameLength}}|{'Win %':^9}|{'Shared %':^10}|{'Win or Shared % (95% CI)':^28}")
+        lines.append('-' * (nameLength + 49))
+        rounds = max(self.rounds, 1)
+        for entry, name in enumerate(self.names):
+            winRate, (lower, upper) = self.getWinRate(entry)
+            interval = f"{100 * winRate:.2f} ({100 * lower:.2f}-{100 * upper:.2f})"
+            lines.append(f"{name:^{nameLength}}|{100 * self.wins[entry] / rounds:^9.2f}|"
+                f"{100 * self.sharedWins[entry] / rounds:^10.2f}|{interval:^28}")
+
+        delimiter = '\n'
+        return delimiter.join(lines)
+
+
+def runTournament(policies, numberOfRounds = 100000, tokenBet = 100, playerStandValue = 17, masterSeed = None, workers = None, \
+    chunkSize = 20000):
+    '''Plays numberOfRounds AI Mode rounds with a Bot for every policy (at most 6) at the same table, spread across a pool of
+    worker processes in chunks of chunkSize rounds, seeded the same way as simulateParallel. Returns a TournamentResults'''
+    if not 1 <= len(policies) <= MAX_PLAYERS_REMAINING:
+        raise ValueError(f'A tournament needs between 1 and {MAX_PLAYERS_REMAINING} policies')
+    if masterSeed is None:
+        masterSeed = secrets.randbits(64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunkArguments = []
+    for chunkIndex, chunkStart in enumerate(range(0, numberOfRounds, chunkSize)):
+        rounds = min(chunkSize, numberOfRounds - chunkStart)
+        chunkArguments.append((policies, chunkIndex % len(policies), rounds, deriveSeed(masterSeed, chunkIndex), tokenBet, playerStandValue))
+
+    results = TournamentResults([policy.getName() for policy in policies] + [f'User (stand on {playerStandValue})'])
+    startTime = time.perf_counter()
+    if workers == 1:
+        for arguments in chunkArguments:
+            results.add(arguments[2], playTournamentChunk(arguments))
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            for arguments, counts in zip(chunkArguments, executor.map(playTournamentChunk, chunkArguments)):
+                results.add(arguments[2], counts)
+    results.elapsed = time.perf_counter() - startTime
+    results.masterSeed = masterSeed
+
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description = 'Play Bot policies against each other')
+    parser.add_argument('rounds', type = int, nargs = '?', default = 100000)
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--workers', type = int, default = None, help = 'number of processes (all cores by default)')
+    parser.add_argument('--table', action = 'append', default = [], help = 'also play a policy table saved with BotPolicy.save')
+    args = parser.parse_args()
+
+    policies = [ThresholdPolicy(17), ThresholdPolicy(15), Soft17Policy(17), CompositionPolicy()]
+    policies += [TablePolicy.fromFile(path) for path in args.table]
+    results = runTournament(policies[:MAX_PLAYERS_REMAINING], args.rounds, masterSeed = args.seed, workers = args.workers)
+    print(f"Master seed: {results.masterSeed}")
+    print(results.getSummary())
@@ -0,0 +1,129 @@
+from functools import lru_cache
+
+BUST = 22 # Every hand value above 21 is recorded as 22
+BOT_STAND_VALUE = 17 # Bots stop drawing at a hand value of 17 and above, the same as the 'AI Loop' state in GameSM
+
+
+def getComposition(deck):
+    '''Returns the cards that have not been dealt from deck as a tuple of 10 counts, where index 0 is the number of Aces,
+    index 1 the number of 2s and so on, until index 9 which is the number of cards with a value of 10 (10, J, Q and K).
+    Read from the index of cards left that the Deck keeps up to date with every draw'''
+    return deck.getComposition()
+
+
+def getSeatState(player):
+    # Returns the (handValue, soft) state of a Player, as used by BotOutcomeEngine
+    return (player.handValue(), player.isSoft())
+
+
+def addCardToState(total, soft, cardValue):
+    '''Returns the (total, soft) state of a hand with the given value, after adding a card with cardValue (Aces as 1).
+    Same as Player.handValue, an Ace counts as 11 as long as the hand does not go above 21'''
+    if soft:
+        total += cardValue
+        if total > 21:
+            # The Ace counted as 11 now has to be counted as 1
+            return (total - 10, False)
+        return (total, True)
+
+    if cardValue == 1 and total <= 10:
+        return (total + 11, True)
+    return (total + cardValue, False)
+
+
+class BotOutcomeEngine():
+    '''Calculates the exact probabilities of the final hand value of a Bot that draws until its hand value is 17 or above,
+    given the remaining cards in the Deck. The results are memoized over (remaining card counts, hand value, soft), in an
+    lru_cache that holds at most cacheSize results, so repeated queries during a round are answered from the cache.
+
+    Distributions are tuples of 23 probabilities, where index v is the probability of finishing with a hand value of v, and
+    index BUST (22) the probability of going above 21'''
+
+    def __init__(self, cacheSize = 200000, standValue = BOT_STAND_VALUE):
+        self.standValue = standValue
+        self.finalDistribution = lru_cache(maxsize = cacheSize)(self.calculateFinalDistribution)
+        self.winProbability = lru_cache(maxsize = cacheSize)(self.calculateWinProbability)
+
+    def calculateFinalDistribution(self, counts, total, soft):
+        distribution = [0.0] * (BUST + 1)
+        if total > 21:
+            distribution[BUST] = 1.0
+            return tuple(distribution)
+
+        remainingCards = sum(counts)
+        if total >= self.standValue or remainingCards == 0:
+            distribution[total] = 1.0
+            return tuple(distribution)
+
+        for index, count in enumerate(counts):
+            if count == 0:
+                continue
+            probability = count / remainingCards
+            nextCounts = counts[:index] + (count - 1,) + counts[index + 1:]
+            nextTotal, nextSoft = addCardToState(total, soft, index + 1)
+            nextDistribution = self.finalDistribution(nextCounts, nextTotal, nextSoft)
+            for value in range(BUST + 1):
+                if nextDistribution[value]:
+                    distribution[value] += probability * nextDistribution[value]
+
+        return tuple(distribution)
+
+    def getFinalValueDistribution(self, counts, total, soft = False):
+        # Returns the final hand value distribution as a dictionary of {handValue: probability}, leaving out impossible values
+        distribution = self.finalDistribution(tuple(counts), total, soft)
+        return {value: probability for value, probability in enumerate(distribution) if probability}
+
+    def calculateWinProbability(self, counts, seats, seatIndex):
+        '''seats is a tuple with a (handValue, soft, finished) tuple for every player at the table. Players that have finished
+        keep their hand value, the others draw to 17 from the remaining cards. Each player's distribution is exact, and the
+        players are combined as if each of them drew from counts on their own. Returns the probabilities that the seat at
+        seatIndex wins alone, shares the win, loses, or that every player busts and gets their tokens back'''
+        distributions = []
+        for total, soft, finished in seats:
+            if finished:
+                distribution = [0.0] * (BUST + 1)
+                distribution[min(total, BUST)] = 1.0
+                distributions.append(distribution)
+            else:
+                distributions.append(self.finalDistribution(counts, total, soft))
+
+        # For each other seat, the probability of finishing below each value (busting counts as below every value)
+        belowValue = []
+        for otherIndex, distribution in enumerate(distributions):
+            if otherIndex == seatIndex:
+                continue
+            cumulative = [distribution[BUST]]
+            for value in range(1, BUST):
+                cumulative.append(cumulative[-1] + distribution[value - 1])
+            belowValue.append((cumulative, distribution))
+
+        winAlone = 0.0
+        winShared = 0.0
+        for value in range(BUST):
+            probability = distributions[seatIndex][value]
+            if not probability:
+                continue
+            allBelow = 1.0
+            allBelowOrEqual = 1.0
+            for cumulative, distribution in belowValue:
+                allBelow *= cumulative[value]
+                allBelowOrEqual *= cumulative[value] + distribution[value]
+            winAlone += probability * allBelow
+            winShared += probability * (allBelowOrEqual - allBelow)
+
+        allBust = distributions[seatIndex][BUST]
+        for cumulative, distribution in belowValue:
+            allBust *= distribution[BUST]
+
+        return {'win': winAlone, 'share': winShared, 'lose': 1.0 - winAlone - winShared - allBust, 'allBust': allBust}
+
+    def getWinProbability(self, counts, seats, seatIndex):
+        return dict(self.winProbability(tuple(counts), tuple(tuple(seat) for seat in seats), seatIndex))
+
+    def getBotDistribution(self, deck, botPlayer):
+        # Final hand value distribution of a Bot in the current round, from the cards left in deck
+        total, soft = getSeatState(botPlayer)
+        return self.getFinalValueDistribution(getComposition(deck), total, soft)
+
+    def getCacheInfo(self):
+        return self.finalDistribution.cache_info()
@@ -0,0 +1,98 @@
+'''What-if branching of a live AI Mode round. At the User's decision to draw another card, the game is forked (GameSM.fork)
+into many branches for each answer, and every branch plays out the rest of the round with its own seed, so the cards still to
+come differ between branches. The average change in the User's tokens of the branches of each answer estimates the value of
+that answer, the same question that HitStandAdvisor (advisor.py) calculates exactly'''
+
+import math
+import random
+import time
+
+
+class BranchInput():
+    '''Input source of a branch. Answers the decision the branch was forked at, and after that the User draws until the hand
+    value reaches standValue'''
+
+    def __init__(self, decision, standValue = 17):
+        self.decision = decision
+        self.standValue = standValue
+
+    def __call__(self, game):
+        if self.decision is not None:
+            decision = self.decision
+            self.decision = None
+            return decision
+        if game.state != 'AI Loop':
+            raise EOFError('The round of the branch has ended')
+        return 'Y' if game.player.handValue() < self.standValue else 'N'
+
+
+def playBranch(game, decision, seed = None, standValue = 17):
+    '''Forks game at the User's decision, answers it with decision ('Y' or 'N') and plays the branch until the end of the round.
+    Returns the change in the User's tokens'''
+    branch = game.fork(BranchInput(decision, standValue), seed)
+    tokensBefore = branch.player.getTokens()
+    while branch.state == 'AI Loop':
+        branch.step(True)
+    return branch.player.getTokens() - tokensBefore
+
+
+def compareDecisions(game, branches = 1000, seed = None, standValue = 17, decisions = ('Y', 'N')):
+    '''Plays branches branches for every decision from the User's turn in game, which is not changed. Every decision is played
+    with the same seeds, so they are compared on the same cards. Returns {decision: (mean token change, standard error)}
+    and the number of branches played per second'''
+    if not game.isUserTurn():
+        raise ValueError("Branches can only be played from the User's turn in an AI Mode round")
+    seedGenerator = random.Random(seed)
+    seeds = [seedGenerator.getrandbits(64) for branch in range(branches)]
+
+    results = {}
+    startTime = time.perf_counter()
+    for decision in decisions:
+        tokenChanges = [playBranch(game, decision, branchSeed, standValue) for branchSeed in seeds]
+        mean = sum(tokenChanges) / branches
+        variance = sum((tokenChange - mean) ** 2 for tokenChange in tokenChanges) / max(branches - 1, 1)
+        results[decision] = (mean, math.sqrt(variance / branches))
+    elapsed = time.perf_counter() - startTime
+
+    return results, branches * len(decisions) / elapsed
+
+
+if __name__ == '__main__':
+    import argparse
+    import io
+    from contextlib import redirect_stdout
+
+    from advisor import HitStandAdvisor
+    from blackjack import GameSM
+    from inputsources import PolicyInput, StandOnPolicy
+    from pacing import NoDelayClock
+
+    parser = argparse.ArgumentParser(description = "Play out both answers to the User's first decision of an AI Mode round many times")
+    parser.add_argument('--branches', type = int, default = 2000, help = 'branches played for each answer')
+    parser.add_argument('--bots', type = int, default = 3, choices = range(1, 7))
+    parser.add_argument('--bet', type = int, default = 100)
+    parser.add_argument('--stand', type = int, default = 17, help = 'hand value at which the User stops drawing in a branch')
+    parser.add_argument('--seed', type = int, default = None)
+    args = parser.parse_args()
+
+    # Play up to the User's first decision of an AI Mode round
+    game = GameSM(args.seed, NoDelayClock(), PolicyInput(StandOnPolicy(args.bots, args.bet)), console = False)
+    game.start()
+    with redirect_stdout(io.StringIO()):
+        while not game.isUserTurn():
+            game.step(True)
+
+    print(f"Your Hand ({game.player.handValue()}):\n{game.player.getPrintHand()}")
+    print(f"You play {game.positionDict[game.playerPosition]} against {args.bots} Bots, betting {game.tokenBet} Tokens\n")
+
+    startTime = time.perf_counter()
+    game.restoreRoundSnapshot(game.saveRoundSnapshot())
+    snapshotTime = time.perf_counter() - startTime
+
+    results, branchesPerSecond = compareDecisions(game, args.branches, args.seed, args.stand)
+    for decision, (mean, standardError) in results.items():
+        print(f"{'Draw' if decision == 'Y' else 'Stand'}: {mean:+.2f} Tokens (± {1.96 * standardError:.2f}) over {args.branches} branches")
+    print(f"{branchesPerSecond:,.0f} branches/sec, snapshot and restore in {snapshotTime * 1e6:.0f}µs")
+
+    advice = HitStandAdvisor().adviseGame(game)
+    print(f"HitStandAdvisor: draw {advice['hit']:+.2f}, stand {advice['stand']:+.2f}")
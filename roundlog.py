@@ -0,0 +1,258 @@
+'''Compact binary log of everything that happens in a game, and a replay engine that plays the log back through GameSM.
+
+A log file starts with LOG_HEADER, followed by records of one byte for the record type and a payload of fixed size (except
+INPUT records, which store the length of the line first). Records are only ever appended, so a log can hold many sessions,
+each starting with a SESSION record. Hit/stand decisions, like every other choice of the User, are INPUT records'''
+
+import io
+import struct
+from contextlib import redirect_stdout
+
+from blackjack import GameSM
+from engine import Deck
+from pacing import NoDelayClock
+
+LOG_HEADER = b'BJLOG1\n'
+
+SESSION = 1 # Starting tokens of the User (uint32)
+DRAW = 2 # Code of the card drawn (uint8), the index of the Card in Deck.cardTable
+INPUT = 3 # Length (uint8) followed by the line of input as UTF-8
+SEAT = 4 # playerPosition and number of Bots (uint8, uint8)
+BOT_NAME = 5 # Index of the name in GameSM.botNamesList (uint8)
+SETTLE = 6 # tokenBet (uint32), change in the User's tokens (int32) and the winning players, User as bit 0 (uint8)
+
+recordStructs = {SESSION: struct.Struct('<I'), DRAW: struct.Struct('<B'), SEAT: struct.Struct('<BB'), \
+                 BOT_NAME: struct.Struct('<B'), SETTLE: struct.Struct('<IiB')}
+
+
+class ReplayMismatch(Exception):
+    '''Raised when a game replayed from a log does not match the log'''
+
+
+class RoundRecorder():
+    '''Appends the events of a GameSM to a log file, through a write buffer of bufferSize bytes. attach starts a new session in
+    the log and records the draws of the game's Deck, every line of input, the seating of the User, the Bot names picked and
+    the settlement at the end of every AI Mode round. close has to be called to write out the last buffered records'''
+
+    def __init__(self, path, bufferSize = 1 << 20):
+        rawFile = open(path, 'ab')
+        if rawFile.tell() == 0:
+            rawFile.write(LOG_HEADER)
+        self.logFile = io.BufferedWriter(rawFile, bufferSize)
+
+    def attach(self, game):
+        game.recorder = self
+        game.deck.drawListener = self.recordDraw
+        self.logFile.write(bytes([SESSION]) + recordStructs[SESSION].pack(game.player.getTokens()))
+
+    def detach(self, game):
+        game.recorder = None
+        game.deck.drawListener = None
+
+    def recordDraw(self, code):
+        self.logFile.write(bytes((DRAW, code)))
+
+    def recordInput(self, line):
+        # Lines longer than 255 bytes are cut at the last whole character, so that the log can always be decoded again
+        encodedLine = line.encode()[:255].decode('utf-8', 'ignore').encode()
+        self.logFile.write(bytes((INPUT, len(encodedLine))) + encodedLine)
+
+    def recordSeat(self, playerPosition, noOfBots):
+        self.logFile.write(bytes((SEAT, playerPosition, noOfBots)))
+
+    def recordBotName(self, nameIndex):
+        self.logFile.write(bytes((BOT_NAME, nameIndex)))
+
+    def recordSettlement(self, tokenBet, tokenChange, winnersList):
+        winners = 0
+        for player, handValue in winnersList:
+            winners |= 1 << player
+        self.logFile.write(bytes([SETTLE]) + recordStructs[SETTLE].pack(tokenBet, tokenChange, winners))
+
+    def flush(self):
+        self.logFile.flush()
+
+    def close(self):
+        self.logFile.close()
+
+
+def readRecords(path, chunkSize = 1 << 20):
+    '''Generator that yields every (recordType, payload) in a log, reading chunkSize bytes at a time, so that logs of any size
+    can be read without loading them into memory. payload is a tuple of values, or the line of input for INPUT records'''
+    with open(path, 'rb') as logFile:
+        if logFile.read(len(LOG_HEADER)) != LOG_HEADER:
+            raise ValueError(f'{path} is not a round log')
+
+        buffer = b''
+        while True:
+            chunk = logFile.read(chunkSize)
+            if not chunk:
+                break
+            buffer += chunk
+            position = 0
+            end = len(buffer)
+            while position < end:
+                recordType = buffer[position]
+                if recordType == INPUT:
+                    if position + 2 > end or position + 2 + buffer[position + 1] > end:
+                        break
+                    length = buffer[position + 1]
+                    yield (INPUT, buffer[position + 2:position + 2 + length].decode())
+                    position += 2 + length
+                else:
+                    recordStruct = recordStructs.get(recordType)
+                    if recordStruct is None:
+                        raise ValueError(f'Unknown record type {recordType} in {path}')
+                    if position + 1 + recordStruct.size > end:
+                        break
+                    yield (recordType, recordStruct.unpack_from(buffer, position + 1))
+                    position += 1 + recordStruct.size
+            # Keep the incomplete record at the end of the chunk for the next one
+            buffer = buffer[position:]
+
+        if buffer:
+            raise ValueError(f'{path} ends with an incomplete record')
+
+
+class ReplayDeck(Deck):
+    '''Deck that draws the cards recorded in the log instead of random cards'''
+
+    def __init__(self, replay):
+        Deck.__init__(self)
+        self.replay = replay
+
+    def drawCard(self):
+        code = self.replay.nextRecord(DRAW)[0]
+        self.cursor += 1
+        self.noOfCardsDrawn += 1
+        self.countCard(code)
+        return self.cardTable[code]
+
+
+class ReplayGameSM(GameSM):
+    '''GameSM that takes the User's input, the seating of the User, the Bot names and the cards drawn from the log of a session,
+    and checks every settlement against the log. Runs without any pauses or clearing of the console'''
+
+    def __init__(self, replay, tokens):
+        GameSM.__init__(self, clock = NoDelayClock(), inputSource = replay.nextInput, console = False)
+        self.replay = replay
+        self.deck = ReplayDeck(replay)
+        self.player.tokens = tokens
+        self.recorder = replay # Receives the settlement of every round to check it against the log
+
+    def choosePlayerPosition(self):
+        playerPosition, noOfBots = self.replay.nextRecord(SEAT)
+        if noOfBots != self.no_OfAI:
+            raise ReplayMismatch(f'Log has {noOfBots} Bots, but the game has {self.no_OfAI}')
+        return playerPosition
+
+    def chooseBotName(self, tempBotNameList):
+        botName = self.botNamesList[self.replay.nextRecord(BOT_NAME)[0]]
+        tempBotNameList.remove(botName)
+        return botName
+
+
+class RoundReplay():
+    '''Replays every session in a log through a ReplayGameSM, at full speed and without any User input. The log is streamed
+    with readRecords, so logs larger than memory can be replayed. Every settlement is checked against the log, and a
+    ReplayMismatch is raised if the game does not match it. Output of the games is discarded unless showOutput is True'''
+
+    def __init__(self, path, showOutput = False, chunkSize = 1 << 20):
+        self.records = readRecords(path, chunkSize)
+        self.showOutput = showOutput
+        self.pendingRecord = None
+        self.sessions = 0
+        self.rounds = 0
+        self.steps = 0
+
+    def readRecord(self):
+        # Returns the next record in the log, or None at the end of the log
+        if self.pendingRecord is not None:
+            record = self.pendingRecord
+            self.pendingRecord = None
+            return record
+        return next(self.records, None)
+
+    def nextRecord(self, expectedType):
+        record = self.readRecord()
+        if record is None:
+            raise EOFError('End of log')
+        recordType, payload = record
+        if recordType == SESSION and expectedType != SESSION:
+            # The session ended before the User quit the game, keep the record for the next session
+            self.pendingRecord = record
+            raise EOFError('End of session')
+        if recordType != expectedType:
+            raise ReplayMismatch(f'Expected record type {expectedType} but the log has {recordType}')
+        return payload
+
+    def nextInput(self, game):
+        return self.nextRecord(INPUT)
+
+    # Called by the ReplayGameSM like a RoundRecorder, only settlements need to be checked
+
+    def recordSeat(self, playerPosition, noOfBots):
+        pass
+
+    def recordBotName(self, nameIndex):
+        pass
+
+    def recordInput(self, line):
+        pass
+
+    def recordSettlement(self, tokenBet, tokenChange, winnersList):
+        loggedBet, loggedChange, loggedWinners = self.nextRecord(SETTLE)
+        winners = 0
+        for player, handValue in winnersList:
+            winners |= 1 << player
+        if (loggedBet, loggedChange, loggedWinners) != (tokenBet, tokenChange, winners):
+            raise ReplayMismatch(f'Settlement {(tokenBet, tokenChange, winners)} does not match the log {(loggedBet, loggedChange, loggedWinners)}')
+        self.rounds += 1
+
+    def replaySession(self, tokens):
+        game = ReplayGameSM(self, tokens)
+        game.start()
+        gameStillOn = True
+        output = None if self.showOutput else io.StringIO()
+        while gameStillOn:
+            try:
+                if output is None:
+                    gameStillOn = game.step(True)
+                else:
+                    with redirect_stdout(output):
+                        gameStillOn = game.step(True)
+                    output.seek(0)
+                    output.truncate()
+            except EOFError:
+                # The log of this session ended before the User quit the game
+                break
+            self.steps += 1
+        return game
+
+    def run(self):
+        # Replays every session in the log, returns the number of sessions and rounds replayed
+        while True:
+            record = self.readRecord()
+            if record is None:
+                break
+            recordType, payload = record
+            if recordType != SESSION:
+                raise ReplayMismatch(f'Expected the start of a session but the log has record type {recordType}')
+            self.replaySession(payload[0])
+            self.sessions += 1
+        return self.sessions, self.rounds
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description = 'Replay a round log through the game')
+    parser.add_argument('path')
+    parser.add_argument('--show-output', action = 'store_true')
+    args = parser.parse_args()
+
+    startTime = time.perf_counter()
+    sessions, rounds = RoundReplay(args.path, args.show_output).run()
+    elapsed = time.perf_counter() - startTime
+    print(f"Replayed {sessions} sessions and {rounds} rounds in {elapsed:.2f}s, every settlement matches the log")
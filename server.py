@@ -0,0 +1,322 @@
+import asyncio
+import io
+import random
+import re
+import time
+from collections import deque
+from contextlib import redirect_stdout
+
+from blackjack import GameSM
+from pacing import AsyncClock, NoDelayClock
+
+# Lines that the server sends on their own after the output of a game, when the game waits for input and when the game has ended
+INPUT_PROMPT = '<<INPUT>>'
+GAME_ENDED = '<<END>>'
+# Line that the server sends first when it records tokens in a ledger, the client replies with the id of its player
+PLAYER_ID_PROMPT = '<<PLAYER>>'
+
+
+class InputNeeded(Exception):
+    '''Raised by TableSession.readLine when the client has not sent the next line of input yet'''
+
+
+class TableSession():
+    '''One game of a client connected to the TableServer, with its own GameSM, and so its own UserPlayer tokens and Deck.
+    GameSM.step cannot wait for input without blocking the event loop, so the session only steps the game with the lines that the
+    client has already sent. If a step asks for a line that has not arrived, readLine raises InputNeeded, and the game is restored
+    to the checkpoint taken before the step. The step is repeated once the line arrives, and as the checkpoint includes the Deck's
+    random number generator, the repeated step prints the same output up to the point where it stopped, which is not sent again'''
+
+    def __init__(self, seed = None, speedUp = None, ledger = None, playerId = None):
+        if speedUp is None:
+            self.clock = NoDelayClock()
+        else:
+            self.clock = AsyncClock(speedUp)
+
+        self.game = GameSM(seed, self.clock, inputSource = self.readLine, console = False)
+        if ledger is not None:
+            ledger.attach(self.game.player, playerId)
+        self.game.start()
+        self.pendingLines = deque()
+        self.consumedLines = []
+        self.sentOutputLength = 0 # Output of the current step that has already been sent
+        self.sentPauseSeconds = 0.0 # Pauses of the current step that have already been waited for
+        self.finished = False
+
+    def addLine(self, line):
+        self.pendingLines.append(line)
+
+    def readLine(self, game):
+        if not self.pendingLines:
+            raise InputNeeded
+        line = self.pendingLines.popleft()
+        self.consumedLines.append(line)
+        return line
+
+    def stepOnce(self):
+        '''Steps the game once, returns the new output of the step and whether the step could be completed'''
+        checkpoint = self.game.saveStepCheckpoint()
+        self.consumedLines = []
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                gameStillOn = self.game.step(True)
+
+        except InputNeeded:
+            # Undo the step and put back the lines it used, only the output that was not sent before is returned
+            self.game.restoreStepCheckpoint(checkpoint)
+            self.pendingLines.extendleft(reversed(self.consumedLines))
+            newOutput = output.getvalue()[self.sentOutputLength:]
+            self.sentOutputLength += len(newOutput)
+            if isinstance(self.clock, AsyncClock):
+                self.clock.pendingSeconds -= self.sentPauseSeconds
+                self.sentPauseSeconds += self.clock.pendingSeconds
+            return newOutput, False
+
+        newOutput = output.getvalue()[self.sentOutputLength:]
+        if isinstance(self.clock, AsyncClock):
+            self.clock.pendingSeconds -= self.sentPauseSeconds
+        self.sentOutputLength = 0
+        self.sentPauseSeconds = 0.0
+        if not gameStillOn:
+            self.finished = True
+        return newOutput, True
+
+
+class TableServer():
+    '''asyncio server that hosts a TableSession for every client that connects. The client sends one line of input at a time, and
+    the server replies with the output of the game followed by INPUT_PROMPT when the game needs more input, or GAME_ENDED when
+    the User has quit the game. speedUp is passed to the AsyncClock of each session, or None to play without any pauses.
+    If a TokenLedger (ledger.py) is given, the server first asks the client for a player id with PLAYER_ID_PROMPT, and the tokens
+    of the session are recorded in the ledger under that id, so a returning player gets their own balance back, even after the
+    server has been restarted. A player can only be connected once at a time'''
+
+    def __init__(self, host = '127.0.0.1', port = 0, seed = None, speedUp = None, ledger = None):
+        self.host = host
+        self.port = port
+        self.speedUp = speedUp
+        self.ledger = ledger
+        self.activePlayerIds = set()
+        self.seedGenerator = random.Random(seed)
+        self.server = None
+        self.activeSessions = 0
+        self.completedSessions = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handleClient, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def serveForever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def advance(self, session, writer):
+        # Steps the session until it needs more input, sending the output of every step and waiting for its pauses
+        while not session.finished:
+            output, completed = session.stepOnce()
+            if output:
+                writer.write(output.encode())
+            if isinstance(session.clock, AsyncClock):
+                await session.clock.settle()
+            if not completed:
+                writer.write(f'{INPUT_PROMPT}\n'.encode())
+                break
+
+        if session.finished:
+            writer.write(f'{GAME_ENDED}\n'.encode())
+        await writer.drain()
+
+    async def readPlayerId(self, reader, writer):
+        # Asks the client for its player id, returns None if the client did not send a valid id that is not already connected
+        writer.write(f'{PLAYER_ID_PROMPT}\n'.encode())
+        await writer.drain()
+        playerId = (await reader.readline()).decode().strip()
+        if not playerId:
+            writer.write('A player id is needed to play on this server\n'.encode())
+            return None
+        if playerId in self.activePlayerIds:
+            writer.write(f'Player {playerId} is already connected\n'.encode())
+            return None
+        return playerId
+
+    async def handleClient(self, reader, writer):
+        playerId = None
+        if self.ledger is not None:
+            try:
+                playerId = await self.readPlayerId(reader, writer)
+            except ConnectionError:
+                pass
+            if playerId is None:
+                writer.write(f'{GAME_ENDED}\n'.encode())
+                writer.close()
+                return
+            self.activePlayerIds.add(playerId)
+
+        session = TableSession(self.seedGenerator.getrandbits(64), self.speedUp, self.ledger, playerId)
+        self.activeSessions += 1
+        try:
+            await self.advance(session, writer)
+            while not session.finished:
+                line = await reader.readline()
+                if not line:
+                    break
+                session.addLine(line.decode().rstrip('\r\n'))
+                await self.advance(session, writer)
+        except ConnectionError:
+            pass
+        finally:
+            self.activeSessions -= 1
+            self.completedSessions += 1
+            # The tokens of the session are written out by the background thread of the ledger, without blocking the event loop
+            self.activePlayerIds.discard(playerId)
+            writer.close()
+
+
+class LoadClient():
+    '''Load generator for the TableServer. Every simulated client plays a number of AI Mode rounds and then quits the game,
+    drawing until a hand value of 17 like the Bots do. Records the latency of every step, from sending a line of input until
+    the server asks for the next one. If the server asks for a player id, every session plays as a new player, with an id
+    starting with playerIdPrefix'''
+
+    handValuePattern = re.compile(r'The value of your hand is (\d+)')
+
+    def __init__(self, host, port, noOfBots = 3, tokenBet = 100, roundsPerSession = 1, playerIdPrefix = 'load'):
+        self.host = host
+        self.port = port
+        self.noOfBots = noOfBots
+        self.tokenBet = tokenBet
+        self.roundsPerSession = roundsPerSession
+        self.playerIdPrefix = f'{playerIdPrefix}-{time.time_ns()}'
+        self.noOfSessions = 0
+        self.stepLatencies = []
+        self.completedSessions = 0
+
+    def chooseReply(self, output, roundsPlayed):
+        # Decides the next line of input from the last output of the game
+        if 'Enter 1 for Practice Mode' in output:
+            return '2' if roundsPlayed < self.roundsPerSession else '3'
+        if 'How many AI do you want to play against' in output:
+            return str(self.noOfBots)
+        if 'How many tokens would you like to wager' in output:
+            return str(self.tokenBet)
+        if 'Would you like to draw another card' in output:
+            handValue = int(self.handValuePattern.findall(output)[-1])
+            return 'Y' if handValue < 17 else 'N'
+        return 'N'
+
+    async def readUntilPrompt(self, reader, writer, playerId):
+        # Reads the output of the server until it asks for input, returns the output and whether the game has ended
+        lines = []
+        while True:
+            line = await reader.readline()
+            if not line:
+                return ''.join(lines), True
+            line = line.decode()
+            if line.rstrip('\n') == PLAYER_ID_PROMPT:
+                writer.write(f'{playerId}\n'.encode())
+                await writer.drain()
+                continue
+            if line.rstrip('\n') == INPUT_PROMPT:
+                return ''.join(lines), False
+            if line.rstrip('\n') == GAME_ENDED:
+                return ''.join(lines), True
+            lines.append(line)
+
+    async def playSession(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.noOfSessions += 1
+        playerId = f'{self.playerIdPrefix}-{self.noOfSessions}'
+        roundsPlayed = 0
+        output, ended = await self.readUntilPrompt(reader, writer, playerId)
+        while not ended:
+            reply = self.chooseReply(output, roundsPlayed)
+            if reply == '2':
+                roundsPlayed += 1
+            startTime = time.perf_counter()
+            writer.write(f'{reply}\n'.encode())
+            await writer.drain()
+            output, ended = await self.readUntilPrompt(reader, writer, playerId)
+            self.stepLatencies.append(time.perf_counter() - startTime)
+
+        writer.close()
+        self.completedSessions += 1
+
+    async def run(self, noOfSessions, concurrency = 100):
+        '''Plays noOfSessions sessions, with at most concurrency sessions connected at the same time, and returns a report'''
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limitedSession():
+            async with semaphore:
+                await self.playSession()
+
+        startTime = time.perf_counter()
+        await asyncio.gather(*[limitedSession() for i in range(noOfSessions)])
+        elapsed = time.perf_counter() - startTime
+
+        return self.getReport(elapsed)
+
+    def getReport(self, elapsed):
+        latencies = sorted(self.stepLatencies)
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        else:
+            p50 = p99 = 0.0
+        return {'sessions': self.completedSessions, 'steps': len(latencies), 'elapsed': elapsed, \
+            'sessionsPerSecond': self.completedSessions / elapsed if elapsed else 0.0, \
+            'p50StepLatencyMs': p50 * 1000, 'p99StepLatencyMs': p99 * 1000}
+
+
+async def runLocalLoadTest(noOfSessions = 1000, concurrency = 100, noOfBots = 3, roundsPerSession = 1, seed = None, speedUp = None, \
+    ledger = None):
+    # Starts a TableServer on a local socket and runs the LoadClient against it in the same event loop, returns the report
+    server = TableServer(seed = seed, speedUp = speedUp, ledger = ledger)
+    port = await server.start()
+    client = LoadClient(server.host, port, noOfBots, roundsPerSession = roundsPerSession)
+    report = await client.run(noOfSessions, concurrency)
+    await server.close()
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description = 'Host many Blackjack games in one process, or generate load against a server')
+    parser.add_argument('mode', choices = ['serve', 'load', 'local'])
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8421)
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--speed-up', type = float, default = None, help = 'pace games this many times faster than the console game')
+    parser.add_argument('--sessions', type = int, default = 1000)
+    parser.add_argument('--concurrency', type = int, default = 100)
+    parser.add_argument('--bots', type = int, default = 3, choices = range(1, 7))
+    parser.add_argument('--rounds', type = int, default = 1, help = 'AI Mode rounds played by each load client session')
+    parser.add_argument('--ledger', default = None, help = 'SQLite file to record the tokens of every session in')
+    args = parser.parse_args()
+
+    ledger = None
+    if args.ledger is not None:
+        from ledger import TokenLedger
+        ledger = TokenLedger(args.ledger)
+
+    if args.mode == 'serve':
+        asyncio.run(TableServer(args.host, args.port, args.seed, args.speed_up, ledger).serveForever())
+    else:
+        if args.mode == 'load':
+            client = LoadClient(args.host, args.port, args.bots, roundsPerSession = args.rounds)
+            report = asyncio.run(client.run(args.sessions, args.concurrency))
+        else:
+            report = asyncio.run(runLocalLoadTest(args.sessions, args.concurrency, args.bots, args.rounds, args.seed, args.speed_up, ledger))
+        print(f"{report['sessions']} sessions, {report['steps']} steps in {report['elapsed']:.2f}s")
+        print(f"{report['sessionsPerSecond']:.1f} sessions/sec, p50 step latency {report['p50StepLatencyMs']:.2f}ms, "
+            f"p99 step latency {report['p99StepLatencyMs']:.2f}ms")
+
+    if ledger is not None:
+        ledger.close()
@@ -0,0 +1,42 @@
+'''Vectorized settlement of many AI Mode tables at once, with NumPy. Gives exactly the same results as the settlement at the end
+of 'AI Loop' (getWinnersList and getTokenChange in engine.py), but for every table in a single pass'''
+
+import numpy as np
+
+
+def batchSettle(handValues, bets):
+    '''handValues is an integer array of shape (noOfTables, noOfSeats) with the hand value of every player, the User in column 0
+    followed by the Bots, the same order as the handValueList of 'AI Loop'. Tables with fewer players can be padded with 0,
+    an empty seat that is never part of the pool. bets is the tokenBet of every table (an array of noOfTables, or a single
+    number for all tables), every player at a table bets the same.
+
+    Returns (winners, payouts):
+    winners is a boolean array of the same shape as handValues, True for the player(s) with the highest hand value of 21 or below
+    payouts is an int64 array of the same shape with the change in Tokens of every player. Winners share the pool of
+    tokenBet * number of players (with integer division) and lose their own bet, so a winner receives pool // noOfWinners - bet
+    and every other player loses the bet. If every player has busted, every player gets their Tokens back (a payout of 0)'''
+    handValues = np.asarray(handValues)
+    if handValues.ndim != 2:
+        raise ValueError('handValues has to be an array of shape (noOfTables, noOfSeats)')
+    bets = np.broadcast_to(np.asarray(bets, dtype = np.int64), handValues.shape[:1])
+
+    seated = handValues > 0
+    notBusted = seated & (handValues <= 21)
+    maxWinningValue = np.where(notBusted, handValues, 0).max(axis = 1, initial = 0)
+    winners = notBusted & (handValues == maxWinningValue[:, None])
+
+    noOfWinners = winners.sum(axis = 1)
+    pool = bets * seated.sum(axis = 1)
+    share = pool // np.maximum(noOfWinners, 1)
+
+    payouts = np.where(winners, (share - bets)[:, None], -bets[:, None])
+    # Empty seats have nothing to settle, and when every player has busted, the Tokens are returned
+    payouts[~seated | (noOfWinners == 0)[:, None]] = 0
+
+    return winners, payouts
+
+
+def settleUserPlayer(handValues, bets):
+    # Change in the User's Tokens (column 0) at every table, the same as the winTokens/loseTokens at the end of 'AI Loop'
+    winners, payouts = batchSettle(handValues, bets)
+    return payouts[:, 0]
@@ -0,0 +1,309 @@
+import hashlib
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import Deck, UserPlayer, BotPlayer, getWinnersList, getTokenChange
+from probability import getComposition
+
+class SimulationResults():
+    '''Object that collects the outcome of many simulated AI Mode rounds. Seats are numbered by turn order, the same way as
+    playerPosition in GameSM (Seat 1 plays first). Contains methods merge, getRoundsPerSecond and getSummary'''
+
+    def __init__(self, numberOfBots):
+        self.numberOfBots = numberOfBots
+        self.rounds = 0
+        self.elapsed = 0.0
+
+        # Per seat counters, index 0 is unused so that seat numbers can be used directly
+        numberOfSeats = numberOfBots + 2
+        self.seatWins = [0] * numberOfSeats
+        self.seatSharedWins = [0] * numberOfSeats
+        self.seatLosses = [0] * numberOfSeats
+        self.seatBusts = [0] * numberOfSeats
+        self.seatHandValueTotal = [0] * numberOfSeats
+
+        # Per Bot counters, by the index of the Bot in botPlayerList, so that Bots with different policies can be compared
+        self.botWins = [0] * numberOfBots
+        self.botSharedWins = [0] * numberOfBots
+        self.botLosses = [0] * numberOfBots
+
+        # Counters for the User, who is seated randomly every round
+        self.playerWins = 0
+        self.playerSharedWins = 0
+        self.playerLosses = 0
+        self.allBustRounds = 0
+        self.tokenChange = 0
+        self.topUps = 0
+
+    def merge(self, other):
+        # Adds the counters of another SimulationResults object (with the same number of Bots) into this one
+        self.rounds += other.rounds
+        self.elapsed += other.elapsed
+        for seat in range(self.numberOfBots + 2):
+            self.seatWins[seat] += other.seatWins[seat]
+            self.seatSharedWins[seat] += other.seatSharedWins[seat]
+            self.seatLosses[seat] += other.seatLosses[seat]
+            self.seatBusts[seat] += other.seatBusts[seat]
+            self.seatHandValueTotal[seat] += other.seatHandValueTotal[seat]
+        for botNumber in range(self.numberOfBots):
+            self.botWins[botNumber] += other.botWins[botNumber]
+            self.botSharedWins[botNumber] += other.botSharedWins[botNumber]
+            self.botLosses[botNumber] += other.botLosses[botNumber]
+
+        self.playerWins += other.playerWins
+        self.playerSharedWins += other.playerSharedWins
+        self.playerLosses += other.playerLosses
+        self.allBustRounds += other.allBustRounds
+        self.tokenChange += other.tokenChange
+        self.topUps += other.topUps
+
+    def getCounts(self):
+        # Returns every counter as a tuple (everything except the elapsed time), so that results of different runs can be compared
+        return (self.rounds, tuple(self.seatWins), tuple(self.seatSharedWins), tuple(self.seatLosses), tuple(self.seatBusts), \
+            tuple(self.seatHandValueTotal), tuple(self.botWins), tuple(self.botSharedWins), tuple(self.botLosses), self.playerWins, self.playerSharedWins, self.playerLosses, self.allBustRounds, \
+            self.tokenChange, self.topUps)
+
+    def getRoundsPerSecond(self):
+        if self.elapsed == 0:
+            return 0.0
+        return self.rounds / self.elapsed
+
+    def getSummary(self):
+        # Returns a table of the results per seat, in the same format as the results table at the end of AI Mode
+        rounds = max(self.rounds, 1)
+        lines = [f"{self.rounds} rounds with {self.numberOfBots} Bots in {self.elapsed:.2f}s ({self.getRoundsPerSecond():,.0f} rounds/sec)\n"]
+        lines.append(f"{'Seat':^6}|{'Win %':^10}|{'Shared %':^10}|{'Loss %':^10}|{'Bust %':^10}|{'Avg Value':^11}")
+        lines.append('-' * 61)
+        for seat in range(1, self.numberOfBots + 2):
+            lines.append(f"{seat:^6}|{100 * self.seatWins[seat] / rounds:^10.2f}|{100 * self.seatSharedWins[seat] / rounds:^10.2f}|"
+                f"{100 * self.seatLosses[seat] / rounds:^10.2f}|{100 * self.seatBusts[seat] / rounds:^10.2f}|{self.seatHandValueTotal[seat] / rounds:^11.2f}")
+
+        lines.append(f"\nUser won {self.playerWins}, shared {self.playerSharedWins}, lost {self.playerLosses}, "
+            f"all players busted in {self.allBustRounds} rounds")
+        lines.append(f"User token change: {self.tokenChange} ({self.tokenChange / rounds:.2f} per round), topped up {self.topUps} times")
+
+        delimiter = '\n'
+        return delimiter.join(lines)
+
+
+class RoundSimulator():
+    '''Headless version of the AI Mode in GameSM. Plays complete rounds with the same rules as the 'AI' and 'AI Loop' states
+    (random seating, Bots drawing until a hand value of 17, a shared pool of tokens and split wins) without any printing, sleeping
+    or clearing of the console. botPolicies can give every Bot a BotPolicy (policies.py) instead of drawing to 17. The User draws until playerStandValue is reached, mirroring the Bots by default, or follows
+    playerAdvisor (a HitStandAdvisor from advisor.py) if one is given.
+    Like GameSM, the Deck is reset after every round, unless a penetration is given, in which case the same shoe of noOfDecks decks
+    is kept across rounds until the penetration is reached. If a HandStore (handstore.py) is given, the hands of every round are
+    added to it'''
+
+    def __init__(self, numberOfBots = 3, tokenBet = 100, playerStandValue = 17, startingTokens = 1000, seed = None, \
+        noOfDecks = 1, penetration = None, playerAdvisor = None, botPolicies = None, handStore = None):
+        self.numberOfBots = numberOfBots
+        self.botPolicies = botPolicies if botPolicies is not None else [None] * numberOfBots
+        self.tokenBet = tokenBet
+        self.playerStandValue = playerStandValue
+        self.playerAdvisor = playerAdvisor
+        self.handStore = handStore
+        self.keepShoe = penetration is not None
+        self.deck = Deck(seed, noOfDecks, penetration if self.keepShoe else 1.0)
+        self.player = UserPlayer(startingTokens)
+
+        # Bot names do not affect the outcome of a round, so each seat keeps the same Bot name
+        self.botNamesList = BotPlayer.botNamesList[:numberOfBots]
+
+    def playRound(self, results):
+        # Plays a single round and records the outcome into results
+        deck = self.deck
+        player = self.player
+        numberOfBots = self.numberOfBots
+
+        # Same as 'Start Screen', top up the User if there are less than 100 tokens left
+        if player.getTokens() < 100:
+            player.winTokens(100)
+            results.topUps += 1
+
+        # A shoe kept across rounds is reshuffled before dealing, once the penetration has been reached
+        if self.keepShoe:
+            deck.reshuffleIfNeeded()
+
+        # Same as 'AI', a bet of more than the available tokens is limited to the maximum
+        tokenBet = min(self.tokenBet, player.getTokens())
+        playerPosition = deck.rng.randint(1, numberOfBots + 1)
+
+        # Deal 2 cards to the User, followed by 2 cards to each Bot
+        player.addCard(deck.drawCard())
+        player.addCard(deck.drawCard())
+        botPlayerList = []
+        for name, policy in zip(self.botNamesList, self.botPolicies):
+            botPlayer = BotPlayer(name, policy)
+            botPlayer.addCard(deck.drawCard())
+            botPlayer.addCard(deck.drawCard())
+            botPlayerList.append(botPlayer)
+
+        # Take turns in seat order, seatList maps each index in handValueList to its seat
+        seatList = []
+        botNumberCounter = 0
+        for seat in range(1, numberOfBots + 2):
+            if seat == playerPosition:
+                if self.playerAdvisor is None:
+                    while player.handValue() < self.playerStandValue:
+                        player.addCard(deck.drawCard())
+                else:
+                    while self.adviseHit(botPlayerList, botNumberCounter, tokenBet):
+                        player.addCard(deck.drawCard())
+            else:
+                botPlayer = botPlayerList[botNumberCounter]
+                while botPlayer.shouldDraw(numberOfBots + 1 - seat, deck):
+                    botPlayer.addCard(deck.drawCard())
+                botNumberCounter += 1
+                seatList.append(seat)
+
+        handValueList = [player.handValue()]
+        for botPlayer in botPlayerList:
+            handValueList.append(botPlayer.handValue())
+        seatList.insert(0, playerPosition)
+        if self.handStore is not None:
+            self.handStore.addRound([player] + botPlayerList, tokenBet)
+
+        # Settle the round the same way as the end of 'AI Loop'
+        winnersList = getWinnersList(handValueList)
+        for index, handValue in enumerate(handValueList):
+            seat = seatList[index]
+            results.seatHandValueTotal[seat] += handValue
+            if handValue > 21:
+                results.seatBusts[seat] += 1
+
+        if len(winnersList) == 0:
+            # Every player gets their tokens back
+            results.allBustRounds += 1
+
+        else:
+            winningPlayers = [winner[0] for winner in winnersList]
+            for index, seat in enumerate(seatList):
+                if index not in winningPlayers:
+                    results.seatLosses[seat] += 1
+                elif len(winnersList) == 1:
+                    results.seatWins[seat] += 1
+                else:
+                    results.seatSharedWins[seat] += 1
+
+            for botNumber in range(numberOfBots):
+                if botNumber + 1 not in winningPlayers:
+                    results.botLosses[botNumber] += 1
+                elif len(winnersList) == 1:
+                    results.botWins[botNumber] += 1
+                else:
+                    results.botSharedWins[botNumber] += 1
+
+            if winningPlayers[0] == 0:
+                tokenChange = getTokenChange(winnersList, 0, tokenBet, numberOfBots + 1)
+                player.winTokens(tokenChange)
+                results.tokenChange += tokenChange
+                if len(winnersList) == 1:
+                    results.playerWins += 1
+                else:
+                    results.playerSharedWins += 1
+            else:
+                player.loseTokens(tokenBet)
+                results.tokenChange -= tokenBet
+                results.playerLosses += 1
+
+        results.rounds += 1
+        player.clearHand()
+        if not self.keepShoe:
+            deck.resetDeck()
+
+    def adviseHit(self, botPlayerList, botNumberCounter, tokenBet):
+        # Asks the playerAdvisor whether the User should draw another card, Bots before botNumberCounter have finished their turn
+        opponents = tuple((botPlayer.handValue(), botPlayer.isSoft(), botNumber < botNumberCounter) \
+            for botNumber, botPlayer in enumerate(botPlayerList))
+        advice = self.playerAdvisor.advise(getComposition(self.deck), self.player.handValue(), self.player.isSoft(), \
+            opponents, tokenBet, self.numberOfBots + 1)
+        return advice['action'] == 'hit'
+
+    def simulate(self, numberOfRounds, results = None):
+        # Plays numberOfRounds rounds, returns a SimulationResults object with the aggregated outcome
+        if results is None:
+            results = SimulationResults(self.numberOfBots)
+
+        startTime = time.perf_counter()
+        for roundNumber in range(numberOfRounds):
+            self.playRound(results)
+        results.elapsed += time.perf_counter() - startTime
+
+        return results
+
+
+def simulate(numberOfRounds, numberOfBots = 3, tokenBet = 100, playerStandValue = 17, seed = None, noOfDecks = 1, penetration = None):
+    # Helper function to simulate rounds without creating a RoundSimulator first
+    simulator = RoundSimulator(numberOfBots, tokenBet, playerStandValue, seed = seed, noOfDecks = noOfDecks, penetration = penetration)
+    return simulator.simulate(numberOfRounds)
+
+
+def deriveSeed(masterSeed, chunkIndex):
+    # Derives an independent seed for each chunk of rounds from the master seed, by hashing both together
+    digest = hashlib.sha256(f'{masterSeed}:{chunkIndex}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def simulateChunk(arguments):
+    # Plays one chunk of rounds with its own RoundSimulator, used by simulateParallel in each worker process
+    chunkSize, numberOfBots, tokenBet, playerStandValue, seed, noOfDecks, penetration = arguments
+    simulator = RoundSimulator(numberOfBots, tokenBet, playerStandValue, seed = seed, noOfDecks = noOfDecks, penetration = penetration)
+    return simulator.simulate(chunkSize)
+
+
+def simulateParallel(numberOfRounds, numberOfBots = 3, tokenBet = 100, playerStandValue = 17, masterSeed = None, \
+    noOfDecks = 1, penetration = None, workers = None, chunkSize = 20000):
+    '''Spreads numberOfRounds rounds across a pool of worker processes. The rounds are split into chunks of chunkSize rounds, and
+    every chunk is played by a new RoundSimulator (with its own Deck and tokens) seeded by deriveSeed(masterSeed, chunkIndex).
+    As the chunks do not depend on the number of workers and are merged in order, the counts of the results are the same
+    for any number of workers. Returns a SimulationResults object, with elapsed set to the wall time of the whole run'''
+    if masterSeed is None:
+        masterSeed = secrets.randbits(64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunkArguments = []
+    for chunkIndex, chunkStart in enumerate(range(0, numberOfRounds, chunkSize)):
+        rounds = min(chunkSize, numberOfRounds - chunkStart)
+        chunkArguments.append((rounds, numberOfBots, tokenBet, playerStandValue, deriveSeed(masterSeed, chunkIndex), noOfDecks, penetration))
+
+    results = SimulationResults(numberOfBots)
+    startTime = time.perf_counter()
+    if workers == 1:
+        chunkResults = map(simulateChunk, chunkArguments)
+        for chunkResult in chunkResults:
+            results.merge(chunkResult)
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            for chunkResult in executor.map(simulateChunk, chunkArguments):
+                results.merge(chunkResult)
+    results.elapsed = time.perf_counter() - startTime
+    results.masterSeed = masterSeed
+
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description = 'Simulate AI Mode rounds without any console output or delays')
+    parser.add_argument('rounds', type = int, nargs = '?', default = 100000)
+    parser.add_argument('--bots', type = int, default = 3, choices = range(1, 7))
+    parser.add_argument('--bet', type = int, default = 100)
+    parser.add_argument('--stand', type = int, default = 17, help = 'hand value at which the User stops drawing')
+    parser.add_argument('--seed', type = int, default = None)
+    parser.add_argument('--decks', type = int, default = 1, choices = range(1, Deck.maxNoOfDecks + 1))
+    parser.add_argument('--penetration', type = float, default = None, help = 'keep the shoe across rounds until this fraction is dealt')
+    parser.add_argument('--workers', type = int, default = None, help = 'run in parallel with this many processes (0 for all cores)')
+    args = parser.parse_args()
+
+    if args.workers is None:
+        results = simulate(args.rounds, args.bots, args.bet, args.stand, args.seed, args.decks, args.penetration)
+    else:
+        results = simulateParallel(args.rounds, args.bots, args.bet, args.stand, args.seed, args.decks, args.penetration, \
+            args.workers or None)
+        print(f"Master seed: {results.masterSeed}")
+    print(results.getSummary())
@@ -0,0 +1,221 @@
+'''Terminal output layer of GameSM. Everything the game displays is composed in memory and written to the terminal in one write
+per frame, instead of a print for every line, and the screen is cleared with ANSI escape codes instead of starting a shell
+with os.system('cls').
+
+In diff mode, the renderer remembers the rows on the screen, and a new frame only redraws the rows that are different from the
+frame before it, and only from the first character that changed. Rows below the previous frame are written out like in the
+normal mode, without moving the cursor. A block of rows, such as a hand, can also be replaced where it is with replaceBlock,
+so a hand that is dealt another card only needs the new card to be drawn. All of this keeps remote terminals over slow links
+responsive. Diff mode works as long as a frame fits on the screen, longer or wider frames are written out like in the normal
+mode'''
+
+import os
+import shutil
+import sys
+
+CLEAR_SCREEN = '\x1b[2J\x1b[H'
+ERASE_LINE = '\x1b[K' # Erases the rest of the row after the cursor
+ERASE_BELOW = '\x1b[J' # Erases everything after the cursor
+
+
+def moveCursor(rowNumber, column = 0):
+    # Moves the cursor to a column of a row, rows and columns are numbered from 0
+    if column == 0:
+        return f'\x1b[{rowNumber + 1}H'
+    return f'\x1b[{rowNumber + 1};{column + 1}H'
+
+
+class DiscardStream():
+    '''Stream that throws away everything written to it, for the output of games that are never shown, such as forks'''
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+class FrameRenderer():
+    '''Buffers the output of a game until flush is called, which writes it to the stream (sys.stdout at the time of writing by
+    default, so that redirect_stdout still works) in a single write. clear starts a new frame. If ansi is False, the output is
+    not going to a terminal, and no escape codes are written at all. Contains methods write, clear, beginBlock, endBlock,
+    replaceBlock, recordInput and flush'''
+
+    def __init__(self, ansi = True, diffMode = False, stream = None, width = None, height = None):
+        self.ansi = ansi
+        self.diffMode = diffMode and ansi
+        self.stream = stream
+        if self.diffMode and not (width and height):
+            # The size of the terminal is only needed to know whether a frame fits on the screen in diff mode
+            terminalSize = shutil.get_terminal_size()
+            width = width or terminalSize.columns
+            height = height or terminalSize.lines
+        self.width = width
+        self.height = height
+        self.pendingText = []
+
+        # Only used in diff mode, the rows of the current frame and the rows that are on the screen
+        self.frameRows = []
+        self.partialRow = '' # Text written after the last complete row of the frame
+        self.screenRows = []
+        self.flushedRows = 0 # Rows of the current frame that have already been written
+        self.redrawFrom = None # First row of the frame replaced by replaceBlock since the last flush
+        self.cursorRow = 0 # Row of the cursor, which is always at the start of a row between flushes
+        self.blocks = {} # (first row, row after the last row) of every block of the frame, by key
+        self.openBlock = None
+        # True while the rows on the screen are not known, at the start and once a frame did not fit on the screen, until the
+        # screen is cleared again
+        self.scrolled = True
+
+        # Counters, to see how much output diff mode saves
+        self.flushes = 0
+        self.charactersWritten = 0
+        self.rowsDrawn = 0
+        self.rowsSkipped = 0
+
+    def write(self, text = '', end = '\n'):
+        # Same as print(text, end = end), but only written to the stream by flush
+        if self.diffMode:
+            rows = f'{self.partialRow}{text}{end}'.split('\n')
+            self.partialRow = rows.pop()
+            self.frameRows.extend(rows)
+        else:
+            self.pendingText.append(f'{text}{end}')
+
+    def clear(self):
+        # Starts a new frame on a clear screen
+        if not self.ansi:
+            return
+        if not self.diffMode:
+            self.pendingText.append(CLEAR_SCREEN)
+            return
+
+        if self.scrolled:
+            # The rows on the screen are not known, so the screen really has to be cleared
+            self.pendingText.append(CLEAR_SCREEN)
+            self.screenRows = []
+            self.cursorRow = 0
+            self.scrolled = False
+        self.frameRows = []
+        self.partialRow = ''
+        self.flushedRows = 0
+        self.redrawFrom = None
+        self.blocks = {}
+        self.openBlock = None
+
+    def beginBlock(self, key):
+        # The rows written from here until endBlock are a block, which can be replaced with replaceBlock(key, text) in this frame
+        if self.diffMode and not self.partialRow:
+            self.openBlock = (key, len(self.frameRows))
+
+    def endBlock(self):
+        if self.openBlock is not None and not self.partialRow:
+            key, firstRow = self.openBlock
+            self.blocks[key] = (firstRow, len(self.frameRows))
+        self.openBlock = None
+
+    def replaceBlock(self, key, text):
+        '''Replaces the rows of the block key of this frame with the rows of text, which is written with a newline at the end
+        like write. Only possible in diff mode, if the frame fits on the screen and text has as many rows as the block, otherwise
+        nothing is written and False is returned'''
+        block = self.blocks.get(key)
+        if block is None or self.scrolled or self.partialRow or len(self.frameRows) >= self.height:
+            return False
+        firstRow, endRow = block
+        rows = text.split('\n')
+        if len(rows) != endRow - firstRow or any(len(row) > self.width for row in rows):
+            return False
+        self.frameRows[firstRow:endRow] = rows
+        self.redrawFrom = firstRow if self.redrawFrom is None else min(self.redrawFrom, firstRow)
+        return True
+
+    def recordInput(self, line):
+        # The terminal echoes a line of input typed by the User as a row of the frame
+        if self.diffMode:
+            self.frameRows.append(line)
+            if len(self.frameRows) >= self.height or len(line) > self.width:
+                # The echo scrolled the screen or wrapped around
+                self.scrolled = True
+            elif not self.scrolled:
+                self.screenRows[len(self.frameRows) - 1:len(self.frameRows)] = [line]
+                self.cursorRow = len(self.frameRows)
+            self.flushedRows = len(self.frameRows)
+
+    def composeRow(self, rowNumber, row):
+        # Draws a row of the frame over the row on the screen, from the first character that is different
+        screenRows = self.screenRows
+        screenRow = screenRows[rowNumber] if rowNumber < len(screenRows) else ''
+        if rowNumber < len(screenRows) and screenRow == row:
+            self.rowsSkipped += 1
+            return
+
+        column = len(os.path.commonprefix((screenRow, row)))
+        move = moveCursor(rowNumber, column)
+        if self.cursorRow == rowNumber and column <= len(move):
+            # The cursor is already on the row, writing the characters that are the same is shorter than moving past them
+            move = ''
+            column = 0
+        # The rest of the row only has to be erased if the row on the screen is longer
+        erase = ERASE_LINE if len(screenRow) > len(row) else ''
+        self.pendingText.append(f'{move}{row[column:]}{erase}\n')
+        self.cursorRow = rowNumber + 1
+        self.rowsDrawn += 1
+
+    def composeDiff(self, complete):
+        frameRows = self.frameRows
+        firstRow = self.flushedRows if self.redrawFrom is None else min(self.redrawFrom, self.flushedRows)
+        self.redrawFrom = None
+        if self.scrolled or len(frameRows) >= self.height or any(len(row) > self.width for row in frameRows[firstRow:]):
+            # Rows of a frame that does not fit on the screen (or wrap around) cannot be addressed, so new rows are written out in order
+            if not self.scrolled:
+                # From the end of the rows written so far, after erasing what is left of the previous frame
+                if self.cursorRow != self.flushedRows:
+                    self.pendingText.append(moveCursor(self.flushedRows))
+                if len(self.screenRows) > self.flushedRows:
+                    self.pendingText.append(ERASE_BELOW)
+            newRows = frameRows[self.flushedRows:]
+            for row in newRows:
+                self.pendingText.append(row + '\n')
+            self.rowsDrawn += len(newRows)
+            self.flushedRows = len(frameRows)
+            self.scrolled = True
+            return
+
+        screenRows = self.screenRows
+        for rowNumber in range(firstRow, len(frameRows)):
+            self.composeRow(rowNumber, frameRows[rowNumber])
+        self.screenRows = frameRows + screenRows[len(frameRows):]
+        self.flushedRows = len(frameRows)
+
+        # Rows of the previous frame below this one are only erased once the frame is complete, so that they can still be
+        # compared with the rest of this frame until then
+        if complete and len(screenRows) > len(frameRows):
+            if self.cursorRow != len(frameRows):
+                self.pendingText.append(moveCursor(len(frameRows)))
+            self.pendingText.append(ERASE_BELOW)
+            self.cursorRow = len(frameRows)
+            self.screenRows = list(frameRows)
+        if self.cursorRow != len(frameRows):
+            # Leave the cursor at the start of the row after the frame, the same as after a print
+            self.pendingText.append(moveCursor(len(frameRows)))
+            self.cursorRow = len(frameRows)
+
+    def flush(self, complete = False):
+        '''Writes everything since the last flush in a single write. complete is True when the frame is finished for now,
+        such as before waiting for input, so that everything left on the screen from the previous frame is erased'''
+        if complete and self.partialRow:
+            # Text without a newline at the end is written as a row of its own
+            self.frameRows.append(self.partialRow)
+            self.partialRow = ''
+        if self.diffMode and (self.flushedRows < len(self.frameRows) or self.redrawFrom is not None or complete):
+            self.composeDiff(complete)
+        if not self.pendingText:
+            return
+
+        text = ''.join(self.pendingText)
+        self.pendingText = []
+        stream = self.stream or sys.stdout
+        stream.write(text)
+        stream.flush()
+        self.flushes += 1
+        self.charactersWritten += len(text)